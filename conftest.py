@@ -0,0 +1,5 @@
+"""pytest: the mpulse_* modules live flat at the repo root."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
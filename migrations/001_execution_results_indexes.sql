@@ -0,0 +1,12 @@
+-- mPulseInsight 001 — indexes behind the dashboard's queries
+--
+-- (tradedate DESC, rank ASC) serves the full-history ORDER BY, the
+-- MAX(tradedate) lookup and every single-date / date-range read.
+-- (symbol, tradedate) serves per-symbol history and the LAG() window used by
+-- the export's --changes mode.
+
+CREATE INDEX IF NOT EXISTS mpulse_exec_tradedate_rank_idx
+    ON mpulse_execution_results (tradedate DESC, rank ASC);
+
+CREATE INDEX IF NOT EXISTS mpulse_exec_symbol_tradedate_idx
+    ON mpulse_execution_results (symbol, tradedate);
@@ -0,0 +1,41 @@
+-- mPulseInsight 002 — materialized latest snapshot and per-date sector rollups
+--
+-- The signal writer refreshes both after each load:
+--     SELECT mpulse_refresh_rollups();
+-- Readers check that mpulse_latest_snapshot is current and fall back to the
+-- base table otherwise, so a missed refresh is never served as "latest".
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mpulse_latest_snapshot AS
+    SELECT *
+    FROM mpulse_execution_results
+    WHERE tradedate = (SELECT MAX(tradedate) FROM mpulse_execution_results);
+
+CREATE UNIQUE INDEX IF NOT EXISTS mpulse_latest_snapshot_symbol_idx
+    ON mpulse_latest_snapshot (symbol);
+
+-- Same buckets as mpulse_signals.signal_class: Bullish / Bearish / Neutral
+CREATE MATERIALIZED VIEW IF NOT EXISTS mpulse_sector_rollup_daily AS
+    SELECT
+        tradedate,
+        COALESCE(sector, 'Unknown')                                   AS sector,
+        COUNT(*)                                                      AS total,
+        COUNT(*) FILTER (WHERE UPPER(signal) LIKE '%HIGH CONVICTION%'
+                            OR UPPER(signal) LIKE '%BULLISH%')        AS bullish,
+        COUNT(*) FILTER (WHERE UPPER(signal) LIKE '%BEARISH%'
+                           AND UPPER(signal) NOT LIKE '%HIGH CONVICTION%'
+                           AND UPPER(signal) NOT LIKE '%BULLISH%')    AS bearish,
+        AVG(s_hybrid::double precision)                               AS avg_hybrid,
+        SUM(final_dollars::double precision)                          AS total_dollars
+    FROM mpulse_execution_results
+    GROUP BY tradedate, COALESCE(sector, 'Unknown');
+
+CREATE UNIQUE INDEX IF NOT EXISTS mpulse_sector_rollup_daily_idx
+    ON mpulse_sector_rollup_daily (tradedate, sector);
+
+CREATE OR REPLACE FUNCTION mpulse_refresh_rollups() RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mpulse_latest_snapshot;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mpulse_sector_rollup_daily;
+END;
+$$;
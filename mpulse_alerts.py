@@ -0,0 +1,536 @@
+"""
+mPulseInsight — watchlist alerts
+Rules are compiled into lookup tables keyed by (field, target, scope) and
+evaluated only on rows that are new or changed since the engine's
+watermark, so a refresh costs about the same with ten rules or ten
+thousand. Fired alerts feed the dashboard's notification panel and the
+configured sinks: an NDJSON outbox file and, optionally, a webhook. Every
+dashboard worker and the cron CLI run their own engine over the same rows;
+the outbox records each alert id once, and only alerts it newly recorded go
+on to the other sinks. Engines re-read the rules file when it changes.
+
+Rules file (JSON list), one object per rule:
+
+    {"id": "nvda-hcb",   "owner": "desk", "symbols": ["NVDA"], "field": "signal", "to": "HIGH CONVICTION BUY"}
+    {"id": "tech-exh",   "owner": "ana",  "sectors": ["Technology"], "field": "signal_60d", "to": "EXHAUSTED"}
+    {"id": "risk-off",                    "field": "final_regime", "to": "RISK_OFF"}
+    {"id": "energy-pen", "owner": "ana",  "sectors": ["Energy"], "field": "sector_penalty", "below": 1.0}
+
+Categorical fields (signal, signal_60d, action, execution_stance,
+final_regime) take `to` and/or `kind` (UPGRADE / DOWNGRADE, ordinal fields
+only); numeric fields take `below` or `above` and fire on the crossing.
+
+    python mpulse_alerts.py                          evaluate rows since the watermark once (cron)
+    python mpulse_alerts.py --webhook http://127.0.0.1:9000/alerts
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from collections import defaultdict, deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single dashboard process, no cross-process locking
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from mpulse_data import (SECRETS_PATH, STATE_ROOT, fetch_latest, history_query, load_credentials, private_dir,
+                         run_query)
+from mpulse_signals import CODED_FIELDS, REGIME_LEVELS, map_distinct, regime_key
+
+ALERT_DIR = os.environ.get("MPULSE_ALERT_DIR", os.path.join(STATE_ROOT, "alerts"))
+RULES_PATH = os.environ.get("MPULSE_ALERT_RULES", os.path.join(ALERT_DIR, "rules.json"))
+OUTBOX_PATH = os.path.join(ALERT_DIR, "outbox.ndjson")
+STATE_PATH = os.path.join(ALERT_DIR, "state.pickle")
+WEBHOOK_URL = os.environ.get("MPULSE_ALERT_WEBHOOK")
+MAX_RECENT = 500
+
+# field → (levels or None, parser)
+CATEGORICAL_FIELDS = dict(CODED_FIELDS, final_regime=(REGIME_LEVELS, regime_key))
+MARKET_FIELDS = ("final_regime",)  # one value per tradedate, not per symbol
+KINDS = ("UPGRADE", "DOWNGRADE")
+
+
+# ─────────────────────────────────────────────
+# RULES
+# ─────────────────────────────────────────────
+def load_rules(path=RULES_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_rules(rules, path=RULES_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}"
+    with open(tmp, "w") as f:
+        json.dump(rules, f, indent=2)
+    os.replace(tmp, path)
+
+
+def update_rules(change, path=RULES_PATH):
+    """Apply `change(rules) -> rules` to the rules file under an exclusive lock; returns the new rules.
+
+    Every dashboard worker edits the same file, so the read-modify-write is
+    serialized on a sidecar lock file (saves replace the rules file itself).
+    Raises ValueError without writing anything if the result doesn't compile.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file closes
+        rules = change(load_rules(path))
+        CompiledRules(rules)
+        save_rules(rules, path)
+    return rules
+
+
+def _scopes(rule):
+    """Lookup scopes a rule is filed under: specific symbols, sectors, or everything."""
+    symbols, sectors = rule.get("symbols") or [], rule.get("sectors") or []
+    if symbols and sectors:
+        raise ValueError(f"rule {rule['id']}: use symbols or sectors, not both")
+    if rule["field"] in MARKET_FIELDS and (symbols or sectors):
+        raise ValueError(f"rule {rule['id']}: {rule['field']} is market-wide; drop symbols/sectors")
+    if symbols:
+        return [("symbol", str(s).upper().strip()) for s in symbols]
+    if sectors:
+        return [("sector", str(s).lower().strip()) for s in sectors]
+    return [("*", None)]
+
+
+class CompiledRules:
+    """Rules indexed for per-event lookups.
+
+    categorical[(field, target)][scope] → rules, where target is the canonical
+    `to` value or "*". thresholds[(field, op)] → (sorted values, [scope → rules])
+    so the thresholds a value crossed are found with two binary searches.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.categorical = defaultdict(lambda: defaultdict(list))
+        by_value = defaultdict(lambda: defaultdict(list))
+        seen = set()
+        for rule in self.rules:
+            if "id" not in rule or "field" not in rule:
+                raise ValueError(f"rule needs an id and a field: {rule}")
+            if rule["id"] in seen:
+                raise ValueError(f"duplicate rule id {rule['id']}")
+            seen.add(rule["id"])
+            field = rule["field"]
+            scopes = _scopes(rule)
+            if field in CATEGORICAL_FIELDS:
+                kind = rule.get("kind")
+                if kind is not None and (kind not in KINDS or CATEGORICAL_FIELDS[field][0] is None):
+                    raise ValueError(f"rule {rule['id']}: kind must be one of {KINDS} on an ordinal field")
+                if "to" not in rule and kind is None:
+                    raise ValueError(f"rule {rule['id']}: {field} rules need `to` and/or `kind`")
+                target = CATEGORICAL_FIELDS[field][1](rule["to"]) if "to" in rule else "*"
+                for scope in scopes:
+                    self.categorical[(field, target)][scope].append(rule)
+            else:
+                ops = [op for op in ("below", "above") if op in rule]
+                if len(ops) != 1:
+                    raise ValueError(f"rule {rule['id']}: numeric field {field} needs exactly one of below/above")
+                key = (field, ops[0], float(rule[ops[0]]))
+                for scope in scopes:
+                    by_value[key][scope].append(rule)
+        self.thresholds = {}
+        for field, op, value in sorted(by_value):
+            values, scoped = self.thresholds.setdefault((field, op), ([], []))
+            values.append(value)
+            scoped.append(by_value[(field, op, value)])
+        self.thresholds = {k: (np.array(v), scoped) for k, (v, scoped) in self.thresholds.items()}
+        self.fields = sorted({r["field"] for r in self.rules})
+        self.categorical_fields = {field for field, _ in self.categorical}
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match_categorical(self, field, to, symbol, sector):
+        out = []
+        for target in (to, "*"):
+            by_scope = self.categorical.get((field, target))
+            if by_scope:
+                out += _in_scope(by_scope, symbol, sector)
+        return out
+
+    def crossed(self, field, op, before, now):
+        """Positions in thresholds[(field, op)] crossed per row: ([lo], [hi]) slices.
+
+        `above v` fires when before <= v < now, `below v` when now < v <= before;
+        an unknown `before` counts as not yet past any threshold.
+        """
+        values, _ = self.thresholds[(field, op)]
+        if op == "above":
+            lo = np.searchsorted(values, np.where(np.isnan(before), -np.inf, before), "left")
+            hi = np.searchsorted(values, now, "left")
+        else:
+            lo = np.searchsorted(values, now, "right")
+            hi = np.searchsorted(values, np.where(np.isnan(before), np.inf, before), "right")
+        hi = np.where(np.isnan(now), lo, hi)
+        return lo, hi
+
+
+def _in_scope(by_scope, symbol, sector):
+    return by_scope.get(("*", None), []) + by_scope.get(("symbol", symbol), []) + \
+        by_scope.get(("sector", sector), [])
+
+
+# ─────────────────────────────────────────────
+# SINKS
+# ─────────────────────────────────────────────
+class OutboxSink:
+    """Append alerts to a local NDJSON file that downstream tools tail.
+
+    Appends hold an exclusive lock on the file and skip ids already in it,
+    so engines in several processes firing the same alert write it once.
+    """
+
+    def __init__(self, path=OUTBOX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._read_to = (None, 0)  # (inode, offset) of the outbox already scanned into _seen
+
+    def send(self, alerts):
+        """Append the alerts whose id isn't in the outbox yet; returns those."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock, open(self.path, "ab+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)  # released when the file closes
+            self._catch_up(f)
+            fresh = []
+            for alert in alerts:
+                if alert["id"] not in self._seen:
+                    self._seen.add(alert["id"])
+                    fresh.append(alert)
+            f.write(b"".join(json.dumps(a).encode() + b"\n" for a in fresh))
+            f.flush()
+            self._read_to = (self._read_to[0], f.tell())
+        return fresh
+
+    def _catch_up(self, f):
+        """Fold ids appended by other processes (or a rotated outbox) into _seen."""
+        info = os.fstat(f.fileno())
+        inode, offset = self._read_to
+        if inode != info.st_ino or info.st_size < offset:
+            self._seen, offset = set(), 0
+        f.seek(offset)
+        for line in f.read().splitlines():
+            try:
+                self._seen.add(json.loads(line)["id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+        self._read_to = (info.st_ino, f.tell())
+
+
+class WebhookSink:
+    """POST each batch as a JSON array (a local receiver stands in for chat/paging in development)."""
+
+    def __init__(self, url, timeout=3):
+        self.url, self.timeout = url, timeout
+
+    def send(self, alerts):
+        req = urllib.request.Request(self.url, data=json.dumps(alerts).encode(),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+def default_sinks():
+    sinks = [OutboxSink()]
+    if WEBHOOK_URL:
+        sinks.append(WebhookSink(WEBHOOK_URL))
+    return sinks
+
+
+# ─────────────────────────────────────────────
+# ENGINE
+# ─────────────────────────────────────────────
+class AlertEngine:
+    """Watermarked rule evaluation over successive loads of the execution history.
+
+    The first update() only records a baseline (the latest row per symbol).
+    After that, each update() looks at rows dated at or after the watermark,
+    skips watermark-date rows whose content hash is unchanged, and diffs the
+    rest against the last state seen per symbol.
+    """
+
+    def __init__(self, rules=(), sinks=()):
+        self.sinks = list(sinks)
+        self._lock = threading.Lock()
+        self.watermark = None
+        self.state = pd.DataFrame()
+        self.hashes = pd.Series(dtype="uint64")
+        self.regime = None
+        self.recent = deque(maxlen=MAX_RECENT)
+        self.seq = 0
+        self.last_error = None
+        self.last_eval = {}
+        self.dirty = False  # state advanced since the last save()
+        self.rules_path = None  # rules file to follow, see watch_rules()
+        self.rules_mtime = None
+        self.set_rules(rules)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for k in ("_lock", "sinks", "compiled", "rules_path", "rules_mtime"):
+            state.pop(k, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self.sinks = []
+        self.rules_path = self.rules_mtime = None
+        self.set_rules(())
+
+    @classmethod
+    def load(cls, rules=(), sinks=(), path=STATE_PATH, rules_path=None):
+        """Engine resumed from its saved watermark/state, or a fresh one.
+
+        With `rules_path`, the rules come from that file and follow it (see
+        watch_rules()) instead of `rules`. Raises PermissionError if the
+        state directory isn't private to this user (see private_dir).
+        """
+        private_dir(os.path.dirname(path) or ".")
+        try:
+            with open(path, "rb") as f:
+                engine = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            engine = cls(rules, sinks)
+        engine.sinks = list(sinks)
+        engine.set_rules(rules)
+        if rules_path is not None:
+            engine.watch_rules(rules_path)
+        return engine
+
+    def save(self, path=STATE_PATH):
+        private_dir(os.path.dirname(path) or ".")
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}"
+        with self._lock, open(tmp, "wb") as f:
+            self.dirty = False
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def set_rules(self, rules):
+        self.compiled = CompiledRules(rules)
+
+    def watch_rules(self, path=RULES_PATH):
+        """Take the rules from `path` now and again whenever its mtime changes.
+
+        Other dashboard workers edit the same file, so each update() checks it.
+        """
+        self.rules_path, self.rules_mtime = path, None
+        self._reload_rules()
+
+    def _reload_rules(self):
+        if self.rules_path is None:
+            return
+        try:
+            mtime = os.stat(self.rules_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self.rules_mtime:
+            self.set_rules(load_rules(self.rules_path))
+            self.rules_mtime = mtime
+
+    # ── evaluation ──
+    def _tracked(self, df):
+        fields = set(CATEGORICAL_FIELDS) - set(MARKET_FIELDS)
+        fields |= {f for f in self.compiled.fields if f not in CATEGORICAL_FIELDS}
+        return [f for f in sorted(fields) if f in df.columns]
+
+    def _canonical(self, day, fields):
+        out = pd.DataFrame(index=day.index)
+        for f in fields:
+            if f in CATEGORICAL_FIELDS:
+                out[f] = map_distinct(day[f], CATEGORICAL_FIELDS[f][1])
+            else:
+                out[f] = pd.to_numeric(day[f], errors="coerce")
+        return out
+
+    def update(self, df):
+        """Evaluate the rules on rows new or changed since the watermark; returns the alerts fired."""
+        if df.empty or "date_str" not in df.columns:
+            return []
+        t0 = time.perf_counter()
+        with self._lock:
+            self._reload_rules()
+            fields = self._tracked(df)
+            if self.watermark is None:
+                latest = df[df["date_str"] == df["date_str"].max()]
+                self._advance(latest, fields)
+                return []
+            rows = df[df["date_str"] >= self.watermark]
+            hashes = pd.util.hash_pandas_object(rows[["symbol", "date_str"] + fields], index=False)
+            unchanged = (rows["date_str"] == self.watermark).to_numpy() & \
+                (hashes.to_numpy() == self.hashes.reindex(rows["symbol"]).to_numpy())
+            rows = rows[~unchanged]
+            fired = []
+            for date, day in rows.groupby("date_str", sort=True):
+                fired += self._evaluate(date, day, fields)
+                self._advance(day, fields)
+            for alert in fired:
+                self.seq += 1
+                alert["seq"] = self.seq
+                self.recent.appendleft(alert)
+            self.last_eval = {"rows": int(len(rows)), "rules": len(self.compiled),
+                              "fired": len(fired), "secs": time.perf_counter() - t0}
+            self.dirty = self.dirty or len(rows) > 0
+        if fired:
+            self._deliver(fired)
+        return fired
+
+    def _advance(self, day, fields):
+        """Fold one tradedate's rows into the per-symbol state and move the watermark."""
+        day = day.drop_duplicates("symbol", keep="last").set_index("symbol")
+        cur = self._canonical(day, fields)
+        if self.state.empty:
+            self.state = cur
+        else:
+            # Today's values replace the symbol's row outright, NaN included; only
+            # columns not tracked today carry over from the old row
+            rest = self.state.reindex(index=cur.index).drop(columns=cur.columns, errors="ignore")
+            self.state = pd.concat([self.state[~self.state.index.isin(cur.index)],
+                                    pd.concat([cur, rest], axis=1)])
+        day_hashes = pd.util.hash_pandas_object(day.reset_index()[["symbol", "date_str"] + fields], index=False)
+        day_hashes.index = day.index
+        self.hashes = pd.concat([self.hashes[~self.hashes.index.isin(day.index)], day_hashes])
+        if "final_regime" in day.columns:
+            self.regime = regime_key(day["final_regime"].mode().iat[0]) if day["final_regime"].notna().any() \
+                else self.regime
+        date = day["date_str"].max()
+        self.watermark = date if self.watermark is None else max(self.watermark, date)
+        self.dirty = True
+
+    def _evaluate(self, date, day, fields):
+        day = day.drop_duplicates("symbol", keep="last").set_index("symbol")
+        compiled = self.compiled
+        if not len(compiled):
+            return []
+        cur = self._canonical(day, fields)
+        prev = self.state.reindex(index=day.index, columns=cur.columns)
+        sectors = day["sector"] if "sector" in day.columns else pd.Series(None, index=day.index)
+        fired = []
+
+        for field in cur.columns:
+            if field in CATEGORICAL_FIELDS:
+                if field not in compiled.categorical_fields:
+                    continue
+                moved = (cur[field] != prev[field]).to_numpy()
+                levels = CATEGORICAL_FIELDS[field][0]
+                for sym in day.index[moved]:
+                    frm, to = prev.at[sym, field], cur.at[sym, field]
+                    frm = None if pd.isna(frm) else frm
+                    kind = None
+                    if levels is not None and frm is not None:
+                        kind = "UPGRADE" if levels.index(to) > levels.index(frm) else "DOWNGRADE"
+                    sector = sectors.get(sym)
+                    for rule in compiled.match_categorical(field, to, sym, str(sector).lower().strip()):
+                        if rule.get("kind") in (None, kind):
+                            fired.append(self._alert(rule, date, sym, sector, field, frm, to, kind))
+            elif field in self.state.columns:  # a newly watched column gets a baseline first
+                now, before = cur[field].to_numpy(float), prev[field].to_numpy(float)
+                for op in ("below", "above"):
+                    if (field, op) not in compiled.thresholds:
+                        continue
+                    _, scoped = compiled.thresholds[(field, op)]
+                    lo, hi = compiled.crossed(field, op, before, now)
+                    for i in np.nonzero(hi > lo)[0]:
+                        sym = day.index[i]
+                        sector = sectors.get(sym)
+                        frm = None if np.isnan(before[i]) else float(before[i])
+                        for by_scope in scoped[lo[i]:hi[i]]:
+                            for rule in _in_scope(by_scope, sym, str(sector).lower().strip()):
+                                fired.append(self._alert(rule, date, sym, sector, field, frm,
+                                                         float(now[i]), op.upper()))
+
+        if "final_regime" in day.columns and day["final_regime"].notna().any():
+            regime = regime_key(day["final_regime"].mode().iat[0])
+            if self.regime is not None and regime != self.regime:
+                kind = "UPGRADE" if REGIME_LEVELS.index(regime) < REGIME_LEVELS.index(self.regime) else "DOWNGRADE"
+                for rule in compiled.match_categorical("final_regime", regime, None, None):
+                    if rule.get("kind") in (None, kind):
+                        fired.append(self._alert(rule, date, None, None, "final_regime", self.regime, regime, kind))
+        return fired
+
+    @staticmethod
+    def _alert(rule, date, symbol, sector, field, frm, to, kind):
+        subject = symbol or "Market"
+        return {
+            "id": f"{rule['id']}:{date}:{symbol or '*'}:{field}",
+            "rule": rule["id"],
+            "owner": rule.get("owner"),
+            "date": date,
+            "symbol": symbol,
+            "sector": None if sector is None or pd.isna(sector) else sector,
+            "field": field,
+            "from": frm,
+            "to": to,
+            "kind": kind,
+            "message": f"{subject} {field} {frm if frm is not None else '—'} → {to}",
+            "fired_at": pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds"),
+        }
+
+    def _deliver(self, alerts):
+        # Outboxes go first: they drop alerts another process already delivered
+        outboxes = [s for s in self.sinks if isinstance(s, OutboxSink)]
+        for sink in outboxes + [s for s in self.sinks if not isinstance(s, OutboxSink)]:
+            if not alerts:
+                return
+            try:
+                sent = sink.send(alerts)
+            except Exception as e:
+                self.last_error = f"{type(sink).__name__}: {type(e).__name__}: {e}"
+                continue
+            if sink in outboxes:
+                alerts = sent
+
+    def alerts(self, owner=None, limit=50):
+        """Most recent alerts first, optionally for one owner."""
+        out = [a for a in self.recent if owner is None or a.get("owner") == owner]
+        return out[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate mPulse watchlist alerts on new rows.")
+    parser.add_argument("--rules", default=RULES_PATH, help="rules JSON file")
+    parser.add_argument("--state", default=STATE_PATH, help="watermark/state file")
+    parser.add_argument("--outbox", default=OUTBOX_PATH, help="NDJSON outbox path")
+    parser.add_argument("--webhook", default=WEBHOOK_URL, help="also POST alerts to this URL")
+    parser.add_argument("--secrets", default=SECRETS_PATH, help="secrets.toml with a [postgres] block")
+    args = parser.parse_args(argv)
+
+    creds = load_credentials(args.secrets)
+    sinks = [OutboxSink(args.outbox)] + ([WebhookSink(args.webhook)] if args.webhook else [])
+    engine = AlertEngine.load(sinks=sinks, path=args.state, rules_path=args.rules)
+    if engine.watermark is None:
+        df = fetch_latest(creds)
+    else:
+        # Only rows at or after the watermark leave the database
+        df = run_query(creds, *history_query(start=engine.watermark))
+    fired = engine.update(df)
+    engine.save(args.state)
+    for alert in fired:
+        print(f"{alert['date']}  {alert['rule']:<20} {alert['message']}")
+    print(f"{len(fired)} alert(s) · watermark {engine.watermark}", file=sys.stderr)
+    if engine.last_error:
+        print(f"delivery failed: {engine.last_error}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
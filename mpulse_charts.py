@@ -0,0 +1,168 @@
+"""
+mPulseInsight — chart theme and figure cache
+Registers the dashboard's dark terminal look as a Plotly template, builds
+the shared figures, and keeps finished figures in a process-wide LRU keyed
+by (view, params, data version), so identical charts across sessions and
+reruns are built once. st.plotly_chart still serializes a figure on every
+render.
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+TEMPLATE = "mpulse_terminal"
+
+_terminal = go.layout.Template(pio.templates["plotly_dark"])
+_terminal.layout.update(
+    paper_bgcolor="#080c10",
+    plot_bgcolor="#0b1016",
+    font=dict(family="JetBrains Mono", color="#78909c", size=10),
+    margin=dict(l=20, r=20, t=40, b=20),
+    xaxis=dict(gridcolor="#1e2d3d"),
+    yaxis=dict(gridcolor="#1e2d3d"),
+    legend=dict(bgcolor="rgba(0,0,0,0)", font=dict(size=9)),
+)
+pio.templates[TEMPLATE] = _terminal
+
+FACTOR_KEYS = [("f_score", "F"), ("gv_score", "gV"), ("smart_money_score", "Ṡ"),
+               ("analyst_score", "Ã"), ("pipeline_score", "P"), ("risk_score", "r")]
+FACTOR_COLORS = ["#00e676", "#00e5ff", "#ffd54f", "#7c4dff", "#ff6d00", "#ef9a9a"]
+REGIME_COLORS = ["#00e676", "#ffd54f", "#ff6d00", "#ff1744"]  # REGIME_LEVELS order
+SCORE_THRESHOLDS = ((0.78, "#00e676", "HIGH CONVICTION"), (0.60, "#ffd54f", "BULLISH"),
+                    (0.45, "#ff6d00", "BEARISH"))
+
+
+# ─────────────────────────────────────────────
+# FIGURE CACHE
+# ─────────────────────────────────────────────
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class FigureCache:
+    """LRU of finished figures, keyed by (view, params, data version).
+
+    Cached figures are shared between sessions and must be treated as
+    read-only by callers.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def figure(self, view, params, version, build):
+        """The cached figure for this key, calling `build()` on a miss."""
+        key = (view, _freeze(params), version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        # Build outside the lock; two sessions racing on a miss both build, one wins
+        fig = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = fig
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fig
+
+
+# ─────────────────────────────────────────────
+# FIGURES
+# ─────────────────────────────────────────────
+def sector_breadth_figure(sector_stats):
+    colors = ["#00e676" if v >= 50 else "#ffd54f" if v >= 30 else "#ff6d00"
+              for v in sector_stats["bull_pct"]]
+    fig = go.Figure(go.Bar(
+        x=sector_stats["sector"],
+        y=sector_stats["bull_pct"],
+        marker_color=colors,
+        text=[f"{v:.0f}%" for v in sector_stats["bull_pct"]],
+        textposition="outside",
+        textfont=dict(size=10, color="#90a4ae"),
+    ))
+    fig.update_layout(title="Bullish % by Sector", template=TEMPLATE, height=300,
+                      yaxis=dict(range=[0, 110]), showlegend=False)
+    return fig
+
+
+def sector_trend_figure(trend, days):
+    fig = go.Figure()
+    for sector, g in trend.sort_values("date_str").groupby("sector", sort=True):
+        fig.add_trace(go.Scatter(x=g["date_str"], y=g["bull_pct"], name=str(sector), mode="lines"))
+    fig.update_layout(title=f"Bullish % by Sector — last {days} days", template=TEMPLATE, height=300,
+                      xaxis=dict(title=""), yaxis=dict(title="Bull%", range=[0, 105]))
+    return fig
+
+
+def score_history_figure(hist, ticker, days):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=hist["tradedate"], y=hist["s_hybrid"],
+        name="S_hybrid (daily)",
+        line=dict(color="#00e676", width=2.5),
+        fill="tozeroy", fillcolor="rgba(0,230,118,0.06)"
+    ))
+    if "s_structural" in hist.columns:
+        fig.add_trace(go.Scatter(
+            x=hist["tradedate"], y=hist["s_structural"],
+            name="S_structural (60D)",
+            line=dict(color="#00e5ff", width=2, dash="dot"),
+        ))
+    for y, color, label in SCORE_THRESHOLDS:
+        fig.add_hline(y=y, line=dict(color=color, dash="dash", width=1),
+                      annotation_text=label, annotation_font_size=9)
+    fig.update_layout(title=f"{ticker} — Composite Score History ({days}d)", template=TEMPLATE,
+                      height=320, yaxis=dict(range=[0, 1.05]))
+    return fig
+
+
+def factor_history_figure(hist):
+    """Per-asset factor scores on a 0–1 scale, or None if the history has no factor columns."""
+    available = [(k, label) for k, label in FACTOR_KEYS if k in hist.columns]
+    if not available:
+        return None
+    fig = go.Figure()
+    for i, (key, label) in enumerate(available):
+        vals = hist[key] if key == "risk_score" else hist[key] / 100
+        fig.add_trace(go.Scatter(x=hist["tradedate"], y=vals, name=label,
+                                 line=dict(color=FACTOR_COLORS[i % len(FACTOR_COLORS)], width=1.5)))
+    fig.update_layout(title="Factor Score Trends (normalized 0–1)", template=TEMPLATE, height=280,
+                      yaxis=dict(range=[0, 1.05]), legend=dict(orientation="h"))
+    return fig
+
+
+def universe_factor_figure(universe):
+    """Cross-sectional factor means (factor_trends output, `*_mean` columns)."""
+    fig = go.Figure()
+    labels = dict(FACTOR_KEYS)
+    for i, col in enumerate(c for c in universe.columns if c.endswith("_mean")):
+        fig.add_trace(go.Scatter(x=pd.to_datetime(universe.index), y=universe[col],
+                                 name=labels.get(col[:-5], col),
+                                 line=dict(color=FACTOR_COLORS[i % len(FACTOR_COLORS)], width=1.5)))
+    fig.update_layout(template=TEMPLATE, height=260, margin=dict(t=20),
+                      yaxis=dict(range=[0, 1.05]), legend=dict(orientation="h"))
+    return fig
+
+
+def regime_distribution_figure(shares, title):
+    """Overlaid per-regime histograms from RegimeStatistics.distribution()."""
+    fig = go.Figure()
+    for regime, color in zip(shares.columns, REGIME_COLORS):
+        fig.add_trace(go.Bar(x=shares.index, y=shares[regime], name=regime, marker_color=color, opacity=0.6))
+    fig.update_layout(title=title, template=TEMPLATE, height=280, barmode="overlay", bargap=0.05,
+                      yaxis=dict(tickformat=".0%"), legend=dict(orientation="h"))
+    return fig
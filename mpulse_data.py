@@ -0,0 +1,524 @@
+"""
+mPulseInsight — data layer
+Postgres access and column cleanup shared by the dashboard and the headless
+tools. No Streamlit imports: credentials are passed in (the dashboard hands
+over st.secrets["postgres"]; CLI tools read .streamlit/secrets.toml).
+"""
+
+import os
+import threading
+import time
+import tomllib
+from datetime import timedelta
+
+import pandas as pd
+import psycopg2
+
+from mpulse_signals import action_key, map_distinct, sig60_key, signal_key
+
+TABLE = "mpulse_execution_results"
+
+HISTORY_QUERY = f"SELECT * FROM {TABLE} ORDER BY tradedate DESC, rank ASC"
+# Oldest of the newest %(n)s tradedates: where the full-detail tier starts
+CUTOFF_QUERY = f"""
+    SELECT MIN(tradedate) FROM (
+        SELECT DISTINCT tradedate FROM {TABLE} ORDER BY tradedate DESC LIMIT %(n)s
+    ) AS recent
+"""
+LATEST_QUERY = f"""
+    SELECT * FROM {TABLE}
+    WHERE tradedate = (SELECT MAX(tradedate) FROM {TABLE})
+    ORDER BY rank ASC
+"""
+
+# Materialized views from migrations/002 — used when present and current
+LATEST_VIEW = "mpulse_latest_snapshot"
+SECTOR_VIEW = "mpulse_sector_rollup_daily"
+
+LATEST_VIEW_QUERY = f"""
+    SELECT * FROM {LATEST_VIEW}
+    WHERE tradedate = (SELECT MAX(tradedate) FROM {TABLE})
+    ORDER BY rank ASC
+"""
+# Base-table equivalent of mpulse_sector_rollup_daily
+SECTOR_ROLLUP_QUERY = f"""
+    SELECT
+        tradedate,
+        COALESCE(sector, 'Unknown') AS sector,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE UPPER(signal) LIKE '%%HIGH CONVICTION%%'
+                            OR UPPER(signal) LIKE '%%BULLISH%%') AS bullish,
+        COUNT(*) FILTER (WHERE UPPER(signal) LIKE '%%BEARISH%%'
+                           AND UPPER(signal) NOT LIKE '%%HIGH CONVICTION%%'
+                           AND UPPER(signal) NOT LIKE '%%BULLISH%%') AS bearish,
+        AVG(s_hybrid::double precision) AS avg_hybrid,
+        SUM(final_dollars::double precision) AS total_dollars
+    FROM {TABLE}
+    WHERE tradedate >= %(since)s
+    GROUP BY tradedate, COALESCE(sector, 'Unknown')
+    ORDER BY tradedate
+"""
+
+NUMERIC_COLS = ["f_score", "gv_score", "smart_money_score", "analyst_score",
+                "pipeline_score", "risk_score", "s_hybrid", "s_structural",
+                "sector_strength", "sector_weight", "final_weight", "kelly_fraction",
+                "target_pct", "vix", "spx", "spx_200dma", "beta", "vol_scale",
+                "w_vol", "w_kelly", "sector_penalty"]
+
+# Execution-table column groups
+CORE_COLS = ["rank", "symbol", "sector", "s_hybrid", "signal", "action",
+             "target_pct", "final_dollars", "execution_stance",
+             "suggested_action", "signal_60d", "action_60d"]
+FACTOR_COLS = ["f_score", "gv_score", "smart_money_score", "analyst_score",
+               "pipeline_score", "risk_score"]
+AUDIT_COLS = ["beta", "vol_scale", "kelly_fraction", "w_kelly", "w_vol",
+              "sector_penalty", "s_sector", "sector_weight",
+              "w_final_pre_sector", "final_weight", "s_structural", "sector_strength"]
+COLUMN_GROUPS = {"core": CORE_COLS, "factor": FACTOR_COLS, "audit": AUDIT_COLS}
+
+# Tiered history: every column for the newest RECENT_DATES tradedates, only
+# what the long-horizon views read (signals, scores, factors, weights) before that
+RECENT_DATES = int(os.environ.get("MPULSE_RECENT_DATES", "90"))
+COMPACT_COLS = ["tradedate", "symbol", "sector", "rank",
+                "signal", "signal_60d", "action", "execution_stance", "final_regime",
+                "s_hybrid", "s_structural", *FACTOR_COLS,
+                "final_weight", "final_dollars", "target_pct", "sector_weight", "kelly_fraction"]
+
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+CONNECT_TIMEOUT_SECS = 5  # default `connect_timeout`; a dead endpoint fails over instead of hanging
+# App-owned state (precompute artifacts, alert watermarks) is read back with
+# pickle, so it lives in the user's cache dir rather than a shared temp dir
+STATE_ROOT = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")),
+                          "mpulse")
+
+
+def load_credentials(path=SECRETS_PATH):
+    """[postgres] block of the dashboard's secrets.toml, for use outside Streamlit."""
+    with open(path, "rb") as f:
+        return tomllib.load(f)["postgres"]
+
+
+def private_dir(path):
+    """Create `path` (mode 0700) if missing and return it.
+
+    Raises PermissionError if the directory belongs to another user or is
+    group/world writable: anything unpickled from it must be ours alone.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        info = os.stat(path)
+        if info.st_uid != os.getuid() or info.st_mode & 0o022:
+            raise PermissionError(f"refusing to use {path}: it must be owned by uid {os.getuid()} "
+                                  f"and not group/world writable")
+    return path
+
+
+def connect(creds):
+    return psycopg2.connect(
+        host=creds["host"],
+        port=creds["port"],
+        database=creds["database"],
+        user=creds["user"],
+        password=creds["password"],
+        sslmode=creds.get("sslmode", "require"),
+        connect_timeout=creds.get("connect_timeout", CONNECT_TIMEOUT_SECS),
+    )
+
+
+# ─────────────────────────────────────────────
+# READ ROUTING — replicas first, lag-checked, failover with backoff
+# ─────────────────────────────────────────────
+# The [postgres] block is the primary. Optional `replicas` entries (a list of
+# tables) override any of its keys, typically just host / port:
+#
+#     replicas = [{ host = "replica-1" }, { host = "replica-2", port = 6432 }]
+#     max_replica_lag_days = 0
+#
+# connect() always opens the endpoint it is given (writers, migrations);
+# every read in this module goes through connect_read(), and tags what it
+# returns with the endpoint that served it (df.attrs["endpoint"]).
+LAG_QUERY = f"SELECT (SELECT MAX(tradedate) FROM {TABLE})"
+LAG_CHECK_SECS = 60
+BACKOFF_BASE_SECS = 1.0
+BACKOFF_MAX_SECS = 60.0
+
+
+def endpoint_name(creds):
+    return f"{creds['host']}:{creds['port']}"
+
+
+class ReadRouter:
+    """Picks the endpoint for each read connection and keeps per-endpoint health.
+
+    Replicas are preferred in the order listed, then the primary. A replica
+    whose latest tradedate is more than `max_lag_days` behind the primary's is
+    skipped until its next lag check; an endpoint that fails to connect is
+    backed off exponentially. When nothing healthy is left, stale replicas
+    and then backed-off endpoints are still tried rather than failing outright.
+    """
+
+    def __init__(self, creds):
+        primary = {k: v for k, v in dict(creds).items() if k not in ("replicas", "max_replica_lag_days")}
+        self.endpoints = [("replica", dict(primary, **dict(r))) for r in creds.get("replicas", [])]
+        self.endpoints.append(("primary", primary))
+        self.max_lag = timedelta(days=int(creds.get("max_replica_lag_days", 0)))
+        self._lock = threading.Lock()
+        self.health = {endpoint_name(c): {"role": role, "served": 0, "failures": 0, "down_until": 0.0,
+                                          "latest": None, "checked": float("-inf"), "lagging": False, "error": None}
+                       for role, c in self.endpoints}
+
+    def _plan(self, now):
+        """Endpoints to try, best first."""
+        healthy, stale, down = [], [], []
+        for role, c in self.endpoints:
+            h = self.health[endpoint_name(c)]
+            if h["down_until"] > now:
+                down.append((h["down_until"], role, c))
+            elif h["lagging"] and now - h["checked"] < LAG_CHECK_SECS:
+                stale.append((role, c))
+            else:
+                healthy.append((role, c))
+        return healthy + stale + [(role, c) for _, role, c in sorted(down, key=lambda d: d[0])]
+
+    def _latest(self, conn):
+        with conn.cursor() as cur:
+            cur.execute(LAG_QUERY)
+            latest = cur.fetchone()[0]
+        conn.rollback()
+        return pd.Timestamp(latest) if latest is not None else None
+
+    def _reference(self, now):
+        """The primary's latest tradedate, refreshed at most every LAG_CHECK_SECS.
+
+        A failed probe counts against the primary, never against the replica
+        being checked; the last known value (or None) is returned instead.
+        """
+        role, c = self.endpoints[-1]
+        h = self.health[endpoint_name(c)]
+        if now - h["checked"] >= LAG_CHECK_SECS and h["down_until"] <= now:
+            try:
+                conn = connect(c)
+                try:
+                    latest = self._latest(conn)
+                finally:
+                    conn.close()
+            except Exception as e:
+                self._failed(endpoint_name(c), e, now)
+                return h["latest"]
+            with self._lock:
+                h.update(latest=latest, checked=now)
+        return h["latest"]
+
+    def _is_current(self, name, conn, now):
+        """Lag check for a replica connection, re-run at most every LAG_CHECK_SECS."""
+        h = self.health[name]
+        if now - h["checked"] < LAG_CHECK_SECS:
+            return not h["lagging"]
+        latest = self._latest(conn)
+        reference = self._reference(now)
+        lagging = reference is not None and (latest is None or latest < reference - self.max_lag)
+        with self._lock:
+            h.update(latest=latest, checked=now, lagging=lagging)
+        return not lagging
+
+    def _failed(self, name, error, now):
+        with self._lock:
+            h = self.health[name]
+            h["failures"] += 1
+            h["error"] = str(error).strip().splitlines()[0] if str(error).strip() else type(error).__name__
+            h["down_until"] = now + min(BACKOFF_BASE_SECS * 2 ** (h["failures"] - 1), BACKOFF_MAX_SECS)
+
+    def connect(self):
+        """Open a read connection; returns (conn, endpoint name)."""
+        now = time.monotonic()
+        fallback, last_error = None, None
+        for role, c in self._plan(now):
+            name = endpoint_name(c)
+            conn = None
+            try:
+                conn = connect(c)
+                current = role == "primary" or self._is_current(name, conn, now)
+            except Exception as e:
+                if conn is not None:
+                    conn.close()
+                self._failed(name, e, now)
+                last_error = e
+                continue
+            if not current:
+                # Keep the first stale replica in hand in case nothing current answers
+                if fallback is None:
+                    fallback = (name, conn)
+                else:
+                    conn.close()
+                continue
+            if fallback is not None:
+                fallback[1].close()
+            return self._served(name, conn)
+        if fallback is not None:
+            return self._served(*fallback)
+        raise last_error or psycopg2.OperationalError("no read endpoint available")
+
+    def _served(self, name, conn):
+        with self._lock:
+            h = self.health[name]
+            h.update(served=h["served"] + 1, failures=0, down_until=0.0, error=None)
+        return conn, name
+
+    def status(self):
+        """Per-endpoint health snapshot for the footer / load-test report."""
+        with self._lock:
+            return {name: dict(h) for name, h in self.health.items()}
+
+
+_ROUTERS = {}
+_ROUTERS_LOCK = threading.Lock()
+
+
+def read_router(creds):
+    """The process-wide ReadRouter for this set of endpoints."""
+    key = (endpoint_name(creds), tuple(endpoint_name(dict(creds, **dict(r))) for r in creds.get("replicas", [])))
+    with _ROUTERS_LOCK:
+        if key not in _ROUTERS:
+            _ROUTERS[key] = ReadRouter(creds)
+        return _ROUTERS[key]
+
+
+def connect_read(creds):
+    """(conn, endpoint name) for a read: best replica if one is current, else the primary."""
+    return read_router(creds).connect()
+
+
+def normalize(df):
+    """Lower-case columns, parse tradedate, add date_str and coerce numeric columns."""
+    df.columns = [c.lower() for c in df.columns]
+    if "tradedate" in df.columns:
+        df["tradedate"] = pd.to_datetime(df["tradedate"])
+        df["date_str"] = df["tradedate"].dt.strftime("%Y-%m-%d")
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def served_by(df, endpoint):
+    """Tag a result frame with the read endpoint that produced it."""
+    df.attrs["endpoint"] = endpoint
+    return df
+
+
+def run_query(creds, sql, params=None):
+    conn, endpoint = connect_read(creds)
+    try:
+        df = pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+    return served_by(normalize(df), endpoint)
+
+
+def _view_is_current(conn, view):
+    """True when `view` exists and holds the base table's latest tradedate."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", (view,))
+        if cur.fetchone()[0] is None:
+            return False
+        cur.execute(f"SELECT (SELECT MAX(tradedate) FROM {view}) = (SELECT MAX(tradedate) FROM {TABLE})")
+        return bool(cur.fetchone()[0])
+
+
+def fetch_latest(creds):
+    """Latest tradedate, from mpulse_latest_snapshot when it exists and is current."""
+    conn, endpoint = connect_read(creds)
+    try:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass(%s)", (LATEST_VIEW,))
+                has_view = cur.fetchone()[0] is not None
+            if has_view:
+                df = pd.read_sql(LATEST_VIEW_QUERY, conn)
+                if not df.empty:
+                    return served_by(normalize(df), endpoint)
+        # pd.read_sql re-raises driver errors as pandas' DatabaseError
+        except (psycopg2.Error, pd.errors.DatabaseError):
+            conn.rollback()
+        return served_by(normalize(pd.read_sql(LATEST_QUERY, conn)), endpoint)
+    finally:
+        conn.close()
+
+
+def fetch_sector_rollups(creds, since):
+    """Per-(tradedate, sector) counts from `since` on, from mpulse_sector_rollup_daily when current."""
+    conn, endpoint = connect_read(creds)
+    try:
+        try:
+            if _view_is_current(conn, SECTOR_VIEW):
+                return served_by(normalize(pd.read_sql(
+                    f"SELECT * FROM {SECTOR_VIEW} WHERE tradedate >= %(since)s ORDER BY tradedate",
+                    conn, params={"since": since})), endpoint)
+        # pd.read_sql re-raises driver errors as pandas' DatabaseError
+        except (psycopg2.Error, pd.errors.DatabaseError):
+            conn.rollback()
+        return served_by(normalize(pd.read_sql(SECTOR_ROLLUP_QUERY, conn, params={"since": since})), endpoint)
+    finally:
+        conn.close()
+
+
+def history_query(columns=None, start=None, end=None, symbol=None):
+    """SQL + params over TABLE, newest first: `columns` (default all) for start <= tradedate < end."""
+    where, params = [], {}
+    if symbol is not None:
+        where.append("symbol = %(symbol)s")
+        params["symbol"] = symbol
+    if start is not None:
+        where.append("tradedate >= %(start)s")
+        params["start"] = start
+    if end is not None:
+        where.append("tradedate < %(end)s")
+        params["end"] = end
+    sql = f"SELECT {', '.join(columns) if columns else '*'} FROM {TABLE}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY tradedate DESC, rank ASC", params
+
+
+def _share_strings(df):
+    """Point equal strings in object columns at one object each (psycopg2 builds one per row)."""
+    for col in df.columns[df.dtypes == object]:
+        uniq = df[col].dropna().unique()
+        df[col] = df[col].map(dict(zip(uniq, uniq)))
+    return df
+
+
+class TieredHistory:
+    """Execution history in two tiers.
+
+    `frame` has COMPACT_COLS for every tradedate and is what the matrix,
+    transition, allocation and factor views read. The remaining wide columns
+    (notes, audit terms, ...) are kept only for the newest `recent_dates`
+    tradedates, in `wide`, row-aligned with the head of `frame`; `recent`
+    joins the two back together. Older wide columns are paged back in per
+    symbol by `detail()`. `endpoint` names the read endpoint it was loaded from.
+    """
+
+    def __init__(self, recent, tail, recent_dates=RECENT_DATES, endpoint=None):
+        self.recent_dates = recent_dates
+        self.endpoint = endpoint
+        self.cutoff = recent["date_str"].min() if not recent.empty else None
+        cols = [c for c in COMPACT_COLS + ["date_str"] if c in recent.columns or c in tail.columns]
+        self.frame = _share_strings(pd.concat([recent.reindex(columns=cols), tail.reindex(columns=cols)],
+                                              ignore_index=True))
+        self.wide = _share_strings(recent[[c for c in recent.columns if c not in cols]].reset_index(drop=True))
+
+    @property
+    def recent(self):
+        """Every column for the recent tradedates."""
+        return pd.concat([self.frame.iloc[:len(self.wide)], self.wide], axis=1)
+
+    def recent_since(self, start):
+        """`recent` for rows dated `start` or later, filtered before the wide columns are joined."""
+        head = self.frame.iloc[:len(self.wide)]
+        keep = (head["date_str"] >= start).to_numpy()
+        return pd.concat([head[keep], self.wide[keep]], axis=1)
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    def detail(self, symbol, start=None, fetch=None):
+        """Every column for `symbol` from date_str `start` on, newest first.
+
+        Rows older than the recent tier come from `fetch(symbol, start, end)`
+        (e.g. fetch_symbol_history bound to credentials); without one they
+        are left out.
+        """
+        head = self.frame.iloc[:len(self.wide)]
+        keep = (head["symbol"] == symbol).to_numpy()
+        rows = pd.concat([head[keep], self.wide[keep]], axis=1)
+        if start is not None:
+            rows = rows[rows["date_str"] >= start]
+        if fetch is not None and self.cutoff is not None and (start is None or start < self.cutoff):
+            older = fetch(symbol, start, self.cutoff)
+            if not older.empty:
+                rows = pd.concat([rows, older], ignore_index=True)
+        return rows.sort_values("tradedate", ascending=False, ignore_index=True)
+
+
+def load_history(creds, recent_dates=RECENT_DATES):
+    """TieredHistory: all columns for the newest `recent_dates` tradedates, COMPACT_COLS before."""
+    conn, endpoint = connect_read(creds)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CUTOFF_QUERY, {"n": recent_dates})
+            cutoff = cur.fetchone()[0]
+            cur.execute(f"SELECT * FROM {TABLE} LIMIT 0")
+            available = {d[0].lower() for d in cur.description}
+        if cutoff is None:
+            empty = normalize(pd.DataFrame(columns=sorted(available)))
+            return TieredHistory(empty, empty, recent_dates, endpoint)
+        sql, params = history_query(start=cutoff)
+        recent = normalize(pd.read_sql(sql, conn, params=params))
+        sql, params = history_query([c for c in COMPACT_COLS if c in available], end=cutoff)
+        tail = normalize(pd.read_sql(sql, conn, params=params))
+    finally:
+        conn.close()
+    return TieredHistory(recent, tail, recent_dates, endpoint)
+
+
+def fetch_symbol_history(creds, symbol, start=None, end=None):
+    """Every column for one symbol on start <= tradedate < end (the (symbol, tradedate) index)."""
+    sql, params = history_query(symbol=symbol, start=start, end=end)
+    return run_query(creds, sql, params)
+
+
+def iter_query(creds, sql, params=None, chunksize=5000):
+    """Stream a query through a server-side cursor, yielding normalized frames of ≤ chunksize rows."""
+    conn, endpoint = connect_read(creds)
+    try:
+        with conn.cursor(name="mpulse_stream") as cur:
+            cur.itersize = chunksize
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunksize)
+                if not rows:
+                    break
+                # NUMERIC columns arrive as Decimal; coerce_float keeps them off object dtype
+                yield served_by(normalize(pd.DataFrame.from_records(
+                    rows, columns=[d[0] for d in cur.description], coerce_float=True)), endpoint)
+    finally:
+        conn.close()
+
+
+def with_canonical_keys(df):
+    """Add signal_key / signal_60d_key / action_key columns from the canonical parsers."""
+    for col, parse in (("signal", signal_key), ("signal_60d", sig60_key), ("action", action_key)):
+        if col in df.columns:
+            df[f"{col}_key"] = map_distinct(df[col], parse)
+    return df
+
+
+def normalized_factors(df):
+    """Factor scores on a 0–1 scale (risk_score is already 0–1; the rest come in 0–100)."""
+    cols = [c for c in FACTOR_COLS if c in df.columns]
+    out = df[cols].copy()
+    for c in cols:
+        if c != "risk_score":
+            out[c] = out[c] / 100
+    return out
+
+
+def display_frame(df, groups=None):
+    """Consumer-facing copy of `df`: canonical keys, 0–1 factors, tradedate as YYYY-MM-DD.
+
+    `groups` projects onto COLUMN_GROUPS (plus the keys of projected columns);
+    None keeps every column.
+    """
+    out = with_canonical_keys(df.copy())
+    factors = normalized_factors(out)
+    out[factors.columns] = factors
+    if groups is None:
+        cols = ["date_str"] + [c for c in out.columns if c not in ("date_str", "tradedate")]
+    else:
+        cols = ["date_str"]
+        for g in groups:
+            cols += [c for c in COLUMN_GROUPS[g] if c in out.columns and c not in cols]
+        cols += [f"{c}_key" for c in ("signal", "signal_60d", "action") if c in cols and f"{c}_key" in out.columns]
+    return out[cols].rename(columns={"date_str": "tradedate"})
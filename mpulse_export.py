@@ -0,0 +1,229 @@
+"""
+mPulseInsight — headless execution export
+Streams execution snapshots to Parquet, CSV or newline-delimited JSON for
+downstream order systems, using the dashboard's data layer and canonical
+signal/action parsing. Runs without a Streamlit server.
+
+    python mpulse_export.py --out orders.csv --actions ENTER,ACCUMULATE
+    python mpulse_export.py --start 2025-01-01 --end 2025-03-31 --columns core,audit --out q1.parquet
+    python mpulse_export.py --changes --since 2025-03-28 --format ndjson --out -
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from mpulse_data import COLUMN_GROUPS, SECRETS_PATH, TABLE, display_frame, iter_query, load_credentials
+from mpulse_signals import action_key, map_distinct, signal_key, stance_key
+
+FORMATS = ("parquet", "csv", "ndjson")
+CHANGE_FIELDS = (("signal", signal_key), ("action", action_key), ("execution_stance", stance_key))
+
+
+# ─────────────────────────────────────────────
+# QUERY
+# ─────────────────────────────────────────────
+def build_query(date=None, start=None, end=None, all_dates=False, changes=False):
+    """SQL + params for the requested date selection; defaults to the latest tradedate.
+
+    With `changes`, each row carries its symbol's previous-tradedate values
+    (prev_*) so the change filter can be applied while streaming. The LAG
+    window only spans the selected dates plus the tradedate before the first
+    of them, not the whole table.
+    """
+    where, params = [], {}
+    if date:
+        where.append("tradedate = %(date)s")
+        params["date"] = date
+    elif start or end:
+        if start:
+            where.append("tradedate >= %(start)s")
+            params["start"] = start
+        if end:
+            where.append("tradedate <= %(end)s")
+            params["end"] = end
+    elif not all_dates:
+        where.append(f"tradedate = (SELECT MAX(tradedate) FROM {TABLE})")
+
+    source = TABLE
+    if changes:
+        lags = ", ".join(f"LAG({f}) OVER w AS prev_{f}" for f, _ in CHANGE_FIELDS)
+        source = (f"(SELECT *, LAG(tradedate) OVER w AS prev_tradedate, {lags} FROM {TABLE}"
+                  f"{_window_filter(date, start, end, all_dates)} "
+                  f"WINDOW w AS (PARTITION BY symbol ORDER BY tradedate)) AS t")
+    sql = f"SELECT * FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY tradedate ASC, rank ASC", params
+
+
+def _window_filter(date, start, end, all_dates):
+    """WHERE clause for the --changes LAG subquery: the selection plus one baseline tradedate."""
+    where = []
+    if date:
+        first = "%(date)s"
+        where.append("tradedate <= %(date)s")
+    else:
+        first = "%(start)s" if start else None
+        if end:
+            where.append("tradedate <= %(end)s")
+        if not (start or end or all_dates):
+            first = f"(SELECT MAX(tradedate) FROM {TABLE})"
+    if first:
+        # The tradedate before `first` (or `first` itself when nothing precedes it)
+        where.append(f"tradedate >= COALESCE((SELECT MAX(tradedate) FROM {TABLE} "
+                     f"WHERE tradedate < {first}), {first})")
+    return " WHERE " + " AND ".join(where) if where else ""
+
+
+# ─────────────────────────────────────────────
+# CHUNK TRANSFORMS
+# ─────────────────────────────────────────────
+def changed_rows(chunk):
+    """Rows whose canonical signal, action or stance differs from the symbol's previous tradedate."""
+    changed = chunk["prev_tradedate"].isna() if "prev_tradedate" in chunk.columns \
+        else pd.Series(True, index=chunk.index)
+    for field, parse in CHANGE_FIELDS:
+        if field in chunk.columns and f"prev_{field}" in chunk.columns:
+            changed |= map_distinct(chunk[field], parse) != map_distinct(chunk[f"prev_{field}"], parse)
+    return chunk[changed]
+
+
+# ─────────────────────────────────────────────
+# WRITERS — append one chunk at a time
+# ─────────────────────────────────────────────
+class CsvWriter:
+    def __init__(self, path):
+        self.f = sys.stdout if path == "-" else open(path, "w", newline="")
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.f, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class NdjsonWriter:
+    def __init__(self, path):
+        self.f = sys.stdout if path == "-" else open(path, "w")
+
+    def write(self, chunk):
+        if len(chunk):
+            self.f.write(chunk.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n")
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+        if path == "-":
+            raise SystemExit("Parquet export needs a file path, not stdout")
+        self.pa, self.pq, self.path = pa, pq, path
+        self.writer = None
+
+    def write(self, chunk):
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self._schema(chunk))
+        # Pin every chunk to one schema so a column's type can't drift between chunks
+        self.writer.write_table(self.pa.Table.from_pandas(chunk, schema=self.writer.schema,
+                                                          preserve_index=False))
+
+    def _schema(self, chunk):
+        """The first chunk's schema, with all-null columns typed as strings rather than null.
+
+        Every non-text column is numeric or a timestamp and keeps a concrete
+        type even when empty; only object (text) columns can infer as null.
+        """
+        schema = self.pa.Schema.from_pandas(chunk, preserve_index=False)
+        for i, field in enumerate(schema):
+            if self.pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(self.pa.string()))
+        return schema
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {"parquet": ParquetWriter, "csv": CsvWriter, "ndjson": NdjsonWriter}
+
+
+def export(creds, out, fmt, groups=("core",), actions=None, chunksize=5000, **selection):
+    """Stream the selected snapshot(s) to `out`; returns the number of rows written."""
+    sql, params = build_query(**selection)
+    writer = WRITERS[fmt](out)
+    written = 0
+    try:
+        for chunk in iter_query(creds, sql, params, chunksize=chunksize):
+            if selection.get("changes"):
+                chunk = changed_rows(chunk)
+            if actions:
+                chunk = chunk[map_distinct(chunk["action"], action_key).isin(actions)]
+            if chunk.empty:
+                continue
+            writer.write(display_frame(chunk, groups))
+            written += len(chunk)
+    finally:
+        writer.close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export mPulse execution snapshots.")
+    when = parser.add_mutually_exclusive_group()
+    when.add_argument("--date", help="single tradedate (YYYY-MM-DD); default: latest")
+    when.add_argument("--start", help="first tradedate of a range")
+    when.add_argument("--all", action="store_true", help="every tradedate")
+    parser.add_argument("--end", help="last tradedate of a range")
+    parser.add_argument("--changes", action="store_true",
+                        help="only rows whose signal/action/stance changed vs the previous tradedate")
+    parser.add_argument("--since", help="with --changes: shorthand for --start, exclusive")
+    parser.add_argument("--columns", default="core",
+                        help=f"comma-separated column groups from {', '.join(COLUMN_GROUPS)} (default: core)")
+    parser.add_argument("--actions", help="comma-separated canonical actions to keep, e.g. ENTER,ACCUMULATE")
+    parser.add_argument("--format", choices=FORMATS, help="output format (default: from --out extension)")
+    parser.add_argument("--out", default="-", help="output path, or - for stdout (default)")
+    parser.add_argument("--secrets", default=SECRETS_PATH, help="secrets.toml with a [postgres] block")
+    parser.add_argument("--chunksize", type=int, default=5000, help="rows fetched per round trip")
+    args = parser.parse_args(argv)
+
+    groups = [g.strip() for g in args.columns.split(",") if g.strip()]
+    unknown = set(groups) - set(COLUMN_GROUPS)
+    if unknown:
+        parser.error(f"unknown column group(s): {', '.join(sorted(unknown))}")
+    fmt = args.format or {".parquet": "parquet", ".csv": "csv", ".ndjson": "ndjson",
+                          ".jsonl": "ndjson", ".json": "ndjson"}.get(os.path.splitext(args.out)[1], "csv")
+    if args.since and not args.changes:
+        parser.error("--since only applies with --changes")
+    if args.since and (args.date or args.start or args.all):
+        parser.error("--since replaces --start; don't combine it with --date, --start or --all")
+    if args.end and args.date:
+        parser.error("--end is for ranges; it can't be combined with --date")
+    start = args.start
+    if args.since:
+        # --since is exclusive; the row for `since` itself is only the comparison baseline
+        start = (pd.Timestamp(args.since) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+    rows = export(
+        load_credentials(args.secrets), args.out, fmt, groups,
+        actions=[a.strip().upper() for a in args.actions.split(",")] if args.actions else None,
+        chunksize=args.chunksize,
+        date=args.date, start=start, end=args.end, all_dates=args.all, changes=args.changes,
+    )
+    print(f"exported {rows} rows → {args.out} ({fmt})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
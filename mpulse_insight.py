@@ -5,10 +5,28 @@ Production Streamlit Dashboard — Real Schema Edition
 
 import streamlit as st
 import pandas as pd
-import psycopg2
 import plotly.graph_objects as go
-import plotly.express as px
+import threading
+import time
+import uuid
+from concurrent.futures import Future
 from datetime import datetime, timedelta
+from html import escape
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from mpulse_data import (AUDIT_COLS, CORE_COLS, FACTOR_COLS, TieredHistory, fetch_latest, fetch_sector_rollups,
+                         fetch_symbol_history, load_history, read_router)
+from mpulse_signals import SIGNAL_LEVELS, clean_signal
+from mpulse_transitions import TransitionEngine, TRANSITION_FIELDS
+from mpulse_portfolio import AllocationAnalytics, POSITION_CAP
+from mpulse_regimes import RegimeStatistics
+from mpulse_precompute import Precomputer, load_artifacts
+from mpulse_charts import (TEMPLATE, FigureCache, factor_history_figure, score_history_figure,
+                           regime_distribution_figure, sector_breadth_figure, sector_trend_figure,
+                           universe_factor_figure)
+from mpulse_alerts import (CATEGORICAL_FIELDS, RULES_PATH, AlertEngine, default_sinks, load_rules,
+                           update_rules)
+from mpulse_views import data_version, factor_trends, filter_signal_matrix, sector_rollups, signal_pivots, with_breadth
 
 # ─────────────────────────────────────────────
 # 1. PAGE CONFIG
@@ -184,13 +202,14 @@ REGIME_META = {
     "CRASH":    {"label": "CRASH",    "color": "#ff1744", "bg": "rgba(255,23,68,0.15)"},
 }
 
-def clean_signal(s):
-    """Strip emojis/symbols to get canonical signal key."""
-    if not s:
-        return "NEUTRAL"
-    s = str(s).upper().strip()
-    s = s.replace("⚡ ", "").replace("🛡️ ", "").replace("⚡", "").replace("🛡️", "").strip()
-    return s
+REGIME_STAT_LABELS = {
+    "avg_persistence":     "Avg persistence (days)",
+    "median_persistence":  "Median persistence (days)",
+    "enter_exit_rate":     "ENTER runs ending in EXIT",
+    "s_hybrid_p50":        "Median S_hybrid",
+    "kelly_fraction_p50":  "Median Kelly fraction",
+    "observations":        "Symbol-days observed",
+}
 
 def signal_color(s):
     key = clean_signal(s)
@@ -252,38 +271,118 @@ def action_badge(action_str):
 # ─────────────────────────────────────────────
 @st.cache_data(ttl=120, show_spinner=False)
 def load_data():
+    """Tiered history: every column for recent tradedates, compact columns for the long tail.
+
+    Runs off the script thread (see start_history_load), so errors are raised
+    for the script thread to render rather than drawn here.
+    """
+    history = load_history(st.secrets["postgres"])
+    history.frame.attrs["data_version"] = data_version(history.frame, history.wide)
+    return history
+
+
+@st.cache_data(ttl=120, show_spinner=False)
+def load_latest():
+    """Latest tradedate only — enough for the header, KPI strip, Execution and Sector tabs."""
     try:
-        creds = st.secrets["postgres"]
-        conn = psycopg2.connect(
-            host=creds["host"],
-            port=creds["port"],
-            database=creds["database"],
-            user=creds["user"],
-            password=creds["password"],
-            sslmode="require"
-        )
-        df = pd.read_sql(
-            "SELECT * FROM mpulse_execution_results ORDER BY tradedate DESC, rank ASC",
-            conn
-        )
-        conn.close()
-        df.columns = [c.lower() for c in df.columns]
-        if "tradedate" in df.columns:
-            df["tradedate"] = pd.to_datetime(df["tradedate"])
-            df["date_str"] = df["tradedate"].dt.strftime("%Y-%m-%d")
-        for col in ["f_score", "gv_score", "smart_money_score", "analyst_score",
-                    "pipeline_score", "risk_score", "s_hybrid", "s_structural",
-                    "sector_strength", "sector_weight", "final_weight", "kelly_fraction",
-                    "target_pct", "vix", "spx", "spx_200dma", "beta", "vol_scale",
-                    "w_vol", "w_kelly", "sector_penalty"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-        return df
+        return fetch_latest(st.secrets["postgres"])
     except Exception as e:
         st.error(f"⚠️ Database connection failed: {e}")
         return pd.DataFrame()
 
 
+@st.cache_data(ttl=120, show_spinner=False)
+def load_sector_trend(since):
+    """Per-date sector breadth from `since` on, aggregated in Postgres (rollup view when current).
+
+    Raises on database errors so a failure isn't cached; the caller shows it.
+    """
+    return with_breadth(fetch_sector_rollups(st.secrets["postgres"], since))
+
+
+@st.cache_data(ttl=120, show_spinner=False)
+def load_symbol_detail(symbol, start, end):
+    """Every column for one symbol on older tradedates, paged back in from the compacted tier."""
+    return fetch_symbol_history(st.secrets["postgres"], symbol, start, end)
+
+
+def start_history_load():
+    """Run load_data on its own thread so the latest-snapshot panels can paint first.
+
+    One thread per run rather than a shared pool: a cold session never queues
+    behind others, and concurrent misses on the same cache entry still wait
+    on a single load. Returns a Future of (history, seconds).
+    """
+    ctx = get_script_run_ctx()
+    job = Future()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        t0 = time.perf_counter()
+        try:
+            job.set_result((load_data(), time.perf_counter() - t0))
+        except Exception as e:
+            job.set_exception(e)
+
+    threading.Thread(target=run, daemon=True, name="mpulse-history").start()
+    return job
+
+
+@st.cache_resource(show_spinner=False)
+def transition_engine():
+    """One engine per process, shared by every session and extended as new dates land."""
+    return TransitionEngine()
+
+
+@st.cache_resource(show_spinner=False)
+def allocation_analytics():
+    """Per-date allocation metrics, shared by every session."""
+    return AllocationAnalytics()
+
+
+@st.cache_resource(show_spinner=False)
+def regime_statistics():
+    """Per (signal × regime) accumulators, shared by every session."""
+    return RegimeStatistics()
+
+
+@st.cache_resource(show_spinner=False)
+def precomputer():
+    """Process pool that builds the derived views in the background after each load."""
+    return Precomputer()
+
+
+@st.cache_resource(show_spinner=False)
+def alert_engine():
+    """Watchlist rules and their watermark, shared by every session and resumed across restarts."""
+    return AlertEngine.load(sinks=default_sinks(), rules_path=RULES_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def db_router():
+    """Endpoint health for the footer; the same router every read in mpulse_data goes through."""
+    return read_router(st.secrets["postgres"])
+
+
+@st.cache_resource(show_spinner=False)
+def figure_cache():
+    """Finished Plotly figures keyed by (view, params, data version), shared by every session."""
+    return FigureCache()
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _published_views(version):
+    return load_artifacts(version)
+
+
+def precomputed_views(version):
+    """Finished artifacts for `version`, or None while they are still being built."""
+    views = _published_views(version)
+    if views is None:
+        _published_views.clear()  # don't pin the miss; look again next rerun
+    return views
+
+
 # ─────────────────────────────────────────────
 # 5. SIDEBAR
 # ─────────────────────────────────────────────
@@ -341,19 +440,21 @@ with st.sidebar:
 # ─────────────────────────────────────────────
 # 6. LOAD DATA
 # ─────────────────────────────────────────────
+# Latest snapshot first so the header, KPI strip, Execution and Sector tabs
+# paint right away; the full history loads concurrently for the other tabs.
+load_t0 = time.perf_counter()
+history_job = start_history_load()
+
 with st.spinner("Loading market intelligence..."):
-    df = load_data()
+    snap = load_latest()
 
-if df.empty:
+if snap.empty:
     st.warning("No data available. Check your database connection in `.streamlit/secrets.toml`.")
     st.stop()
 
-# Compute recent dates window
-all_dates = sorted(df["date_str"].dropna().unique(), reverse=True)
-recent_dates = all_dates[:lookback_days]
-latest_date  = all_dates[0] if all_dates else None
-
-latest_snap = df[df["date_str"] == latest_date].sort_values("rank").iloc[0] if latest_date else df.iloc[0]
+latest_date = snap["date_str"].iloc[0] if "date_str" in snap.columns else None
+latest_snap = snap.sort_values("rank").iloc[0]
+charts = figure_cache()
 
 
 # ─────────────────────────────────────────────
@@ -404,7 +505,7 @@ st.markdown(f"""
 # ─────────────────────────────────────────────
 # 8. PORTFOLIO KPI STRIP
 # ─────────────────────────────────────────────
-latest_df = df[df["date_str"] == latest_date] if latest_date else df.head(50)
+latest_df = snap
 total_assets   = latest_df["symbol"].nunique()
 enter_count    = latest_df[latest_df["action"].str.upper().str.contains("ENTER", na=False)].shape[0]
 accum_count    = latest_df[latest_df["action"].str.upper().str.contains("ACCUMULATE", na=False)].shape[0]
@@ -419,80 +520,29 @@ k3.metric("CORE LONG",      f"{core_long}",               "Daily + 60D aligned")
 k4.metric("Deployed $",     f"${total_deployed:,.0f}",    "Today's allocation")
 k5.metric("Avg Confidence", f"{avg_conf:.0f}%",           "Kelly-weighted")
 k6.metric("Regime",         rm["label"],                  f"VIX {vix_val:.1f}")
+first_kpi_secs = time.perf_counter() - load_t0
 
 
 # ─────────────────────────────────────────────
 # 9. MAIN TABS
 # ─────────────────────────────────────────────
-tab_matrix, tab_exec, tab_sector, tab_backtest = st.tabs([
+tab_matrix, tab_exec, tab_sector, tab_backtest, tab_changes, tab_portfolio = st.tabs([
     "📡  SIGNAL MATRIX",
     "⚡  EXECUTION TABLE",
     "🏗️  SECTOR BREADTH",
-    "📈  RESEARCH & HISTORY"
+    "📈  RESEARCH & HISTORY",
+    "🔀  CHANGE FEED",
+    "💼  PORTFOLIO DRIFT"
 ])
 
 
-# ══════════════════════════════════════════════
-# TAB 1 — SIGNAL MATRIX (pivot heatmap)
-# ══════════════════════════════════════════════
-with tab_matrix:
-    st.markdown("### Signal Matrix — Rolling Window")
-
-    matrix_df = df[df["date_str"].isin(recent_dates)].copy()
-    if ticker_search:
-        matrix_df = matrix_df[
-            matrix_df["symbol"].str.contains(ticker_search, na=False) |
-            matrix_df.get("sector", pd.Series(dtype=str)).str.contains(ticker_search, case=False, na=False)
-        ]
-    if sig_filter:
-        def sig_match(s):
-            cs = clean_signal(s)
-            return any(f in cs for f in sig_filter)
-        # Keep tickers that had ANY matching signal in the window
-        matching_tickers = matrix_df[matrix_df["signal"].apply(sig_match)]["symbol"].unique()
-        matrix_df = matrix_df[matrix_df["symbol"].isin(matching_tickers)]
-    if min_score > 0:
-        matrix_df = matrix_df[matrix_df["s_hybrid"] >= min_score]
-
-    if matrix_df.empty:
-        st.info("No signals match your filters.")
-    else:
-        # Build pivot
-        pivot = matrix_df.pivot_table(
-            index=["symbol", "sector"] if "sector" in matrix_df.columns else ["symbol"],
-            columns="date_str",
-            values="signal",
-            aggfunc="first"
-        ).reset_index()
-
-        # Latest rank merge for ordering
-        latest_ranks = matrix_df[matrix_df["date_str"] == latest_date][["symbol","rank","s_hybrid"]].drop_duplicates("symbol")
-        pivot = pivot.merge(latest_ranks, on="symbol", how="left").sort_values("rank", na_position="last")
-
-        st.caption(f"Showing {len(pivot)} assets · {len(recent_dates)} days · columns = date")
-
-        # Styled display using st.dataframe with color map
-        display_cols = [c for c in pivot.columns if c not in ["rank", "s_hybrid"]]
-        display_df = pivot[display_cols].set_index("symbol")
-
-        def color_signal_cell(val):
-            cs = clean_signal(str(val))
-            c = signal_color(cs)
-            bg = signal_bg(cs)
-            return f"color: {c}; background-color: {bg}; font-weight: 600; font-size: 11px; font-family: 'JetBrains Mono', monospace;"
-
-        date_cols = [c for c in display_df.columns if c not in ["sector"]]
-        styled = display_df.style.applymap(color_signal_cell, subset=date_cols)
-        st.dataframe(styled, use_container_width=True, height=420)
-
-
 # ══════════════════════════════════════════════
 # TAB 2 — EXECUTION TABLE (full 15-col view)
 # ══════════════════════════════════════════════
 with tab_exec:
     st.markdown("### Execution Intelligence — Today's Orders")
 
-    exec_df = df[df["date_str"] == latest_date].copy() if latest_date else df.head(100)
+    exec_df = snap.copy()
 
     # Apply filters
     if ticker_search:
@@ -505,22 +555,12 @@ with tab_exec:
     if min_score > 0:
         exec_df = exec_df[exec_df["s_hybrid"] >= min_score]
 
-    # Define column sets
-    core_cols = ["rank", "symbol", "sector", "s_hybrid", "signal", "action",
-                 "target_pct", "final_dollars", "execution_stance",
-                 "suggested_action", "signal_60d", "action_60d"]
-    factor_cols = ["f_score", "gv_score", "smart_money_score", "analyst_score",
-                   "pipeline_score", "risk_score"]
-    audit_cols = ["beta", "vol_scale", "kelly_fraction", "w_kelly", "w_vol",
-                  "sector_penalty", "s_sector", "sector_weight",
-                  "w_final_pre_sector", "final_weight", "s_structural", "sector_strength"]
-
-    show_cols = [c for c in core_cols + factor_cols + (audit_cols if show_audit else [])
+    show_cols = [c for c in CORE_COLS + FACTOR_COLS + (AUDIT_COLS if show_audit else [])
                  if c in exec_df.columns]
     table_data = exec_df[show_cols].copy()
 
     # Normalize factor scores for display
-    for fc in factor_cols:
+    for fc in FACTOR_COLS:
         if fc in table_data.columns:
             table_data[fc] = (table_data[fc] / 100).round(3)
 
@@ -603,7 +643,7 @@ with tab_exec:
                                             index=0, label_visibility="collapsed")
 
         if selected_ticker:
-            ticker_hist = df[df["symbol"] == selected_ticker].sort_values("tradedate", ascending=False)
+            ticker_hist = snap[snap["symbol"] == selected_ticker]
             latest_row  = ticker_hist.iloc[0] if not ticker_hist.empty else None
 
             if latest_row is not None:
@@ -779,58 +819,29 @@ with tab_exec:
 with tab_sector:
     st.markdown("### Sector Breadth Analysis")
 
-    if "sector" not in df.columns:
+    if "sector" not in snap.columns:
         st.info("No sector data available.")
     else:
-        sec_df = df[df["date_str"] == latest_date].copy() if latest_date else df.copy()
-
-        def classify(sig):
-            cs = clean_signal(sig)
-            if "HIGH CONVICTION" in cs or "BULLISH" in cs:
-                return "Bullish"
-            elif "BEARISH" in cs:
-                return "Bearish"
-            else:
-                return "Neutral"
-
-        sec_df["sig_class"] = sec_df["signal"].apply(classify)
-
-        sector_stats = sec_df.groupby("sector").agg(
-            total   = ("symbol", "count"),
-            bullish = ("sig_class", lambda x: (x == "Bullish").sum()),
-            bearish = ("sig_class", lambda x: (x == "Bearish").sum()),
-            avg_hybrid = ("s_hybrid", "mean"),
-            total_dollars = ("final_dollars", "sum"),
-        ).reset_index()
-        sector_stats["bull_pct"] = (sector_stats["bullish"] / sector_stats["total"] * 100).round(1)
-        sector_stats["breadth"]  = (sector_stats["bullish"] / sector_stats["total"]).round(3)
-        sector_stats = sector_stats.sort_values("bull_pct", ascending=False)
+        sec_df = snap.copy()
+        sector_stats = sector_rollups(sec_df).sort_values("bull_pct", ascending=False)
 
         # ── Breadth bar chart ──
-        fig_breadth = go.Figure()
-        colors = ["#00e676" if v >= 50 else "#ffd54f" if v >= 30 else "#ff6d00"
-                  for v in sector_stats["bull_pct"]]
-        fig_breadth.add_trace(go.Bar(
-            x=sector_stats["sector"],
-            y=sector_stats["bull_pct"],
-            marker_color=colors,
-            text=[f"{v:.0f}%" for v in sector_stats["bull_pct"]],
-            textposition="outside",
-            textfont=dict(size=10, color="#90a4ae"),
-        ))
-        fig_breadth.update_layout(
-            title="Bullish % by Sector",
-            template="plotly_dark",
-            paper_bgcolor="#080c10",
-            plot_bgcolor="#0b1016",
-            font=dict(family="JetBrains Mono", color="#78909c", size=10),
-            height=300,
-            margin=dict(l=20, r=20, t=40, b=20),
-            xaxis=dict(gridcolor="#1e2d3d"),
-            yaxis=dict(gridcolor="#1e2d3d", range=[0, 110]),
-            showlegend=False,
-        )
-        st.plotly_chart(fig_breadth, use_container_width=True)
+        snap_ver = data_version(snap)
+        st.plotly_chart(charts.figure("sector_breadth", {}, snap_ver,
+                                      lambda: sector_breadth_figure(sector_stats)),
+                        use_container_width=True)
+
+        # ── Breadth trend (server-side rollups; no full history needed) ──
+        trend_since = (snap["tradedate"].max() - timedelta(days=45)).strftime("%Y-%m-%d")
+        try:
+            trend = load_sector_trend(trend_since)
+        except Exception as e:
+            st.error(f"⚠️ Sector trend unavailable: {e}")
+            trend = pd.DataFrame()
+        if not trend.empty and trend["date_str"].nunique() > 1:
+            st.plotly_chart(charts.figure("sector_trend", {"since": trend_since}, data_version(trend),
+                                          lambda: sector_trend_figure(trend, 45)),
+                            use_container_width=True)
 
         # ── Sector table ──
         display_sec = sector_stats[[
@@ -862,6 +873,69 @@ with tab_sector:
             st.warning(f"⚠️ Sector penalty active on: **{', '.join(penalized_sectors)}** — breadth < 30% threshold")
 
 
+# ─────────────────────────────────────────────
+# 10. FULL HISTORY — loaded concurrently since section 6
+# ─────────────────────────────────────────────
+with tab_matrix:
+    with st.spinner("Loading signal history..."):
+        try:
+            history, history_secs = history_job.result()
+        except Exception as e:
+            st.error(f"⚠️ Database connection failed: {e}")
+            history, history_secs = TieredHistory(pd.DataFrame(), pd.DataFrame()), 0.0
+df = history.frame
+full_load_secs = time.perf_counter() - load_t0
+
+if df.empty:
+    with tab_matrix:
+        st.warning("History unavailable — showing the latest snapshot only.")
+    st.stop()
+
+# Hand the new history to the background precompute; read finished views only
+data_ver = df.attrs.get("data_version") or data_version(df)
+precomputer().submit(df, data_ver)
+views = precomputed_views(data_ver)
+
+# Watchlist alerts only look at rows new or changed since their watermark
+alerts = alert_engine()
+alerts.update(history.recent_since(alerts.watermark or df["date_str"].max()))
+if alerts.dirty:
+    alerts.save()
+
+# Compute recent dates window
+all_dates = sorted(df["date_str"].dropna().unique(), reverse=True)
+recent_dates = all_dates[:lookback_days]
+
+
+# ══════════════════════════════════════════════
+# TAB 1 — SIGNAL MATRIX (pivot heatmap)
+# ══════════════════════════════════════════════
+with tab_matrix:
+    st.markdown("### Signal Matrix — Rolling Window")
+
+    if views is not None:
+        pv_signals, pv_hybrid, pv_ranks = views["signal_pivots"]
+    else:
+        pv_signals, pv_hybrid, pv_ranks = signal_pivots(df, recent_dates)
+    display_df = filter_signal_matrix(pv_signals, pv_hybrid, pv_ranks, recent_dates,
+                                      ticker_search, sig_filter, min_score)
+
+    if display_df.empty:
+        st.info("No signals match your filters.")
+    else:
+        st.caption(f"Showing {len(display_df)} assets · {len(recent_dates)} days · columns = date")
+
+        def color_signal_cell(val):
+            cs = clean_signal(str(val))
+            c = signal_color(cs)
+            bg = signal_bg(cs)
+            return f"color: {c}; background-color: {bg}; font-weight: 600; font-size: 11px; font-family: 'JetBrains Mono', monospace;"
+
+        date_cols = [c for c in display_df.columns if c not in ["sector"]]
+        styled = display_df.style.applymap(color_signal_cell, subset=date_cols)
+        st.dataframe(styled, use_container_width=True, height=420)
+
+
 # ══════════════════════════════════════════════
 # TAB 4 — RESEARCH & HISTORY
 # ══════════════════════════════════════════════
@@ -882,87 +956,32 @@ with tab_backtest:
         st.info("No history for selected ticker.")
     else:
         # ── S_hybrid trend chart ──
-        fig = go.Figure()
-
-        # Background regime shading
-        regimes = hist["final_regime"].fillna("NEUTRAL")
-        regime_colors_map = {"RISK_ON": "rgba(0,230,118,0.04)", "NEUTRAL": "rgba(255,213,79,0.04)",
-                             "RISK_OFF": "rgba(255,109,0,0.06)", "CRASH": "rgba(255,23,68,0.08)"}
-
-        fig.add_trace(go.Scatter(
-            x=hist["tradedate"], y=hist["s_hybrid"],
-            name="S_hybrid (daily)",
-            line=dict(color="#00e676", width=2.5),
-            fill="tozeroy", fillcolor="rgba(0,230,118,0.06)"
-        ))
-        if "s_structural" in hist.columns:
-            fig.add_trace(go.Scatter(
-                x=hist["tradedate"], y=hist["s_structural"],
-                name="S_structural (60D)",
-                line=dict(color="#00e5ff", width=2, dash="dot"),
-            ))
-
-        # Threshold lines
-        fig.add_hline(y=0.78, line=dict(color="#00e676", dash="dash", width=1),
-                      annotation_text="HIGH CONVICTION", annotation_font_size=9)
-        fig.add_hline(y=0.60, line=dict(color="#ffd54f", dash="dash", width=1),
-                      annotation_text="BULLISH", annotation_font_size=9)
-        fig.add_hline(y=0.45, line=dict(color="#ff6d00", dash="dash", width=1),
-                      annotation_text="BEARISH", annotation_font_size=9)
-
-        fig.update_layout(
-            title=f"{bt_ticker} — Composite Score History ({bt_days}d)",
-            template="plotly_dark",
-            paper_bgcolor="#080c10",
-            plot_bgcolor="#0b1016",
-            font=dict(family="JetBrains Mono", color="#78909c", size=10),
-            height=320,
-            margin=dict(l=20, r=20, t=40, b=20),
-            xaxis=dict(gridcolor="#1e2d3d"),
-            yaxis=dict(gridcolor="#1e2d3d", range=[0, 1.05]),
-            legend=dict(bgcolor="rgba(0,0,0,0)", font=dict(size=9)),
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        hist_params = {"symbol": bt_ticker, "days": bt_days}
+        st.plotly_chart(charts.figure("score_history", hist_params, data_ver,
+                                      lambda: score_history_figure(hist, bt_ticker, bt_days)),
+                        use_container_width=True)
 
         # ── Factor history sparklines ──
-        factor_keys = [("f_score","F"), ("gv_score","gV"), ("smart_money_score","Ṡ"),
-                       ("analyst_score","Ã"), ("pipeline_score","P"), ("risk_score","r")]
-        available_factors = [(k, label) for k, label in factor_keys if k in hist.columns]
-
-        if available_factors:
-            fig2 = go.Figure()
-            FACTOR_COLORS = ["#00e676","#00e5ff","#ffd54f","#7c4dff","#ff6d00","#ef9a9a"]
-            for i, (fk, fl) in enumerate(available_factors):
-                vals = hist[fk].copy()
-                # normalize to 0-1
-                if fk != "risk_score":
-                    vals = vals / 100
-                fig2.add_trace(go.Scatter(
-                    x=hist["tradedate"], y=vals,
-                    name=fl,
-                    line=dict(color=FACTOR_COLORS[i % len(FACTOR_COLORS)], width=1.5),
-                ))
-
-            fig2.update_layout(
-                title="Factor Score Trends (normalized 0–1)",
-                template="plotly_dark",
-                paper_bgcolor="#080c10",
-                plot_bgcolor="#0b1016",
-                font=dict(family="JetBrains Mono", color="#78909c", size=10),
-                height=280,
-                margin=dict(l=20, r=20, t=40, b=20),
-                xaxis=dict(gridcolor="#1e2d3d"),
-                yaxis=dict(gridcolor="#1e2d3d", range=[0, 1.05]),
-                legend=dict(bgcolor="rgba(0,0,0,0)", font=dict(size=9), orientation="h"),
-            )
+        fig2 = charts.figure("factor_history", hist_params, data_ver, lambda: factor_history_figure(hist))
+        if fig2 is not None:
             st.plotly_chart(fig2, use_container_width=True)
 
+        # ── Universe factor averages ──
+        universe = views["factor_trends"] if views is not None else factor_trends(df)
+        mean_cols = [c for c in universe.columns if c.endswith("_mean")]
+        if mean_cols:
+            with st.expander("Universe factor averages (cross-sectional mean, 0–1)"):
+                st.plotly_chart(charts.figure("universe_factors", {"days": bt_days}, data_ver,
+                                              lambda: universe_factor_figure(universe[mean_cols].tail(bt_days))),
+                                use_container_width=True)
+
         # ── Signal log table ──
         st.markdown("#### Signal Log")
         log_cols = ["date_str","rank","signal","signal_60d","action","action_60d",
                     "s_hybrid","s_structural","suggested_action","execution_stance","notes"]
-        log_cols = [c for c in log_cols if c in hist.columns]
-        log_df = hist[log_cols].sort_values("date_str", ascending=False)
+        detail = history.detail(bt_ticker, hist["date_str"].min(), fetch=load_symbol_detail)
+        log_cols = [c for c in log_cols if c in detail.columns]
+        log_df = detail[log_cols].sort_values("date_str", ascending=False)
 
         st.dataframe(
             log_df.style.applymap(
@@ -975,6 +994,258 @@ with tab_backtest:
             use_container_width=True, hide_index=True, height=320
         )
 
+    # ── Regime-conditioned signal statistics ──
+    st.markdown("#### Signal Behaviour by Regime")
+    if views is not None:
+        regime_stats = views["regime_stats"]
+    else:
+        regime_stats = regime_statistics()
+        regime_stats.update(df)
+
+    days_in = regime_stats.regime_days()
+    st.caption("Trade dates per regime: " + " · ".join(f"{r} {n}" for r, n in days_in.items())
+               + " — runs are attributed to the regime on the day they started")
+    rg1, rg2 = st.columns([3, 2])
+    with rg1:
+        rg_metric = st.selectbox("Statistic", list(REGIME_STAT_LABELS), key="rg_metric",
+                                 format_func=REGIME_STAT_LABELS.get)
+        grid = regime_stats.pivot(rg_metric)
+        peak = grid.max().max()
+        peak = peak if peak > 0 else 1.0
+        st.dataframe(
+            grid.style.format("{:.2f}", na_rep="—").applymap(
+                lambda v: "" if pd.isna(v) else
+                f"color:#eceff1;background-color:rgba(0,229,255,{0.05 + 0.45 * v / peak:.2f});"
+            ),
+            use_container_width=True
+        )
+    with rg2:
+        rg_field = st.radio("Distribution", ["s_hybrid", "kelly_fraction"], horizontal=True, key="rg_field")
+        rg_signal = st.selectbox("Signal", list(SIGNAL_LEVELS), index=3, key="rg_signal")
+        st.plotly_chart(charts.figure("regime_distribution", {"field": rg_field, "signal": rg_signal}, data_ver,
+                                      lambda: regime_distribution_figure(regime_stats.distribution(rg_field, rg_signal),
+                                                                         f"{rg_field} · {rg_signal}")),
+                        use_container_width=True)
+    with st.expander("All regime statistics"):
+        st.dataframe(regime_stats.table().round(3), use_container_width=True, hide_index=True, height=320)
+
+
+# ══════════════════════════════════════════════
+# TAB 5 — CHANGE FEED (what changed since yesterday)
+# ══════════════════════════════════════════════
+with tab_changes:
+    st.markdown("### Change Feed — Signal Transitions")
+
+    if views is not None:
+        engine = views["transitions"]
+    else:
+        engine = transition_engine()
+        engine.update(df)
+
+    if len(engine.dates) < 2:
+        st.info("Need at least two trade dates to compute transitions.")
+    else:
+        prior_dates = list(engine.dates[:-1][::-1])
+        cf1, cf2, cf3 = st.columns([2, 3, 3])
+        with cf1:
+            since_date = st.selectbox("Changes since", prior_dates, index=0, key="cf_since")
+        with cf2:
+            cf_fields = st.multiselect("Fields", list(TRANSITION_FIELDS),
+                                       default=["signal", "signal_60d", "action"], key="cf_fields")
+        with cf3:
+            cf_kinds = st.multiselect("Direction", ["UPGRADE", "DOWNGRADE", "CHANGE", "NEW"], default=[], key="cf_kinds")
+        new_enter_only = st.checkbox("Only new ENTER actions", value=False, key="cf_enter")
+
+        feed = engine.feed(
+            since=since_date,
+            fields=["action"] if new_enter_only else cf_fields,
+            kinds=cf_kinds,
+            to_values=["ENTER"] if new_enter_only else None,
+            search=ticker_search,
+        )
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Transitions", f"{len(feed)}", f"since {since_date}")
+        c2.metric("Upgrades", f"{(feed['kind'] == 'UPGRADE').sum()}")
+        c3.metric("Downgrades", f"{(feed['kind'] == 'DOWNGRADE').sum()}")
+        c4.metric("New ENTERs", f"{((feed['field'] == 'action') & (feed['to'] == 'ENTER')).sum()}")
+
+        def col_kind(val):
+            return {"UPGRADE": "color:#00e676;font-weight:700;",
+                    "DOWNGRADE": "color:#ff1744;font-weight:700;"}.get(val, "color:#78909c;")
+
+        st.dataframe(
+            feed.head(2000).style.applymap(col_kind, subset=["kind"]),
+            use_container_width=True, hide_index=True, height=380
+        )
+
+        # ── Transition-count matrix ──
+        st.markdown("#### Transition Counts")
+        tm_field = st.selectbox("Field", [f for f in TRANSITION_FIELDS if f != "rank"], key="cf_tm_field")
+        counts = engine.transition_counts(tm_field, since=since_date)
+        peak = max(int(counts.to_numpy().max()), 1)
+        st.dataframe(
+            counts.style.applymap(
+                lambda v: f"color:#eceff1;background-color:rgba(0,230,118,{0.05 + 0.45 * v / peak:.2f});"
+            ),
+            use_container_width=True
+        )
+
+
+# ══════════════════════════════════════════════
+# TAB 6 — PORTFOLIO TURNOVER & ALLOCATION DRIFT
+# ══════════════════════════════════════════════
+with tab_portfolio:
+    st.markdown("### Portfolio Turnover & Allocation Drift")
+
+    if views is not None:
+        alloc = views["allocation"]
+    else:
+        alloc = allocation_analytics()
+        alloc.update(df)
+
+    if alloc.daily.empty:
+        st.info("No allocation history available.")
+    else:
+        pf_days = st.slider("History (trade dates)", 5, max(len(alloc.daily), 5),
+                            min(250, max(len(alloc.daily), 5)), key="pf_days")
+        daily = alloc.daily.tail(pf_days)
+        sector_exp = alloc.sector_exposure.tail(pf_days)
+        last = daily.iloc[-1].fillna(0)
+
+        p1, p2, p3, p4, p5, p6 = st.columns(6)
+        p1.metric("Turnover", f"{last['turnover'] * 100:.1f}%", "one-way, vs prior date")
+        p2.metric("Gross", f"{last['gross_weight'] * 100:.1f}%", f"net {last['net_weight'] * 100:.1f}%")
+        p3.metric("Deployed $", f"${last['gross_dollars']:,.0f}", f"traded ${last['traded_dollars']:,.0f}")
+        p4.metric("HHI", f"{last['hhi']:.3f}", f"eff. N {last['effective_n']:.1f}")
+        p5.metric("Cap binding", f"{int(last['cap_bound'])}", f"{last['cap_bind_rate'] * 100:.0f}% at {POSITION_CAP:.0%}")
+        p6.metric("Sector drift", f"{last['sector_drift'] * 100:.1f}%", f"max sector {last['max_sector_weight'] * 100:.1f}%")
+
+        def pf_layout(fig, title, height=260):
+            fig.update_layout(title=title, template=TEMPLATE, height=height, legend=dict(orientation="h"))
+            return fig
+
+        def pf_chart(view, build):
+            st.plotly_chart(charts.figure(view, {"days": pf_days}, data_ver, build), use_container_width=True)
+
+        x = pd.to_datetime(daily.index)
+
+        def turnover_figure():
+            fig = go.Figure()
+            fig.add_trace(go.Bar(x=x, y=daily["turnover"], name="Turnover", marker_color="#00e5ff"))
+            fig.add_trace(go.Scatter(x=x, y=daily["sector_drift"], name="Sector drift",
+                                     line=dict(color="#ffd54f", width=1.5)))
+            return pf_layout(fig, "Daily Turnover & Sector Drift")
+
+        def exposure_figure():
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=x, y=daily["gross_weight"], name="Gross",
+                                     line=dict(color="#00e676", width=2)))
+            fig.add_trace(go.Scatter(x=x, y=daily["net_weight"], name="Net",
+                                     line=dict(color="#00e5ff", width=1.5, dash="dot")))
+            return pf_layout(fig, "Gross / Net Exposure")
+
+        def hhi_figure():
+            fig = go.Figure(go.Scatter(x=x, y=daily["hhi"], name="HHI", line=dict(color="#7c4dff", width=2)))
+            return pf_layout(fig, "Concentration (HHI)")
+
+        def cap_figure():
+            fig = go.Figure(go.Bar(x=x, y=daily["cap_bound"], name="Positions at cap", marker_color="#ff6d00"))
+            return pf_layout(fig, f"Positions at {POSITION_CAP:.0%} Cap")
+
+        def sector_alloc_figure():
+            fig = go.Figure()
+            for sector in sector_exp.columns:
+                fig.add_trace(go.Scatter(x=pd.to_datetime(sector_exp.index), y=sector_exp[sector],
+                                         name=str(sector), stackgroup="sectors", line=dict(width=0.5)))
+            return pf_layout(fig, "Sector Allocation (Σ final_weight)", height=320)
+
+        pc1, pc2 = st.columns(2)
+        with pc1:
+            pf_chart("pf_turnover", turnover_figure)
+        with pc2:
+            pf_chart("pf_exposure", exposure_figure)
+
+        pc3, pc4 = st.columns(2)
+        with pc3:
+            pf_chart("pf_hhi", hhi_figure)
+        with pc4:
+            pf_chart("pf_cap", cap_figure)
+
+        if sector_exp.shape[1]:
+            pf_chart("pf_sectors", sector_alloc_figure)
+
+        st.markdown("#### Daily Allocation Metrics")
+        st.dataframe(daily.sort_index(ascending=False).round(4), use_container_width=True, height=320)
+
+
+# ─────────────────────────────────────────────
+# 11. ALERTS — notification panel + rule editor (sidebar)
+# ─────────────────────────────────────────────
+ALERT_NUMERIC_FIELDS = ["sector_penalty", "s_hybrid", "kelly_fraction", "rank"]
+
+with st.sidebar:
+    st.markdown("---")
+    st.markdown("#### 🔔 Alerts")
+    al_owner = st.text_input("Alert owner", "", placeholder="blank = everyone", key="al_owner").strip()
+    feed_alerts = alerts.alerts(owner=al_owner or None, limit=15)
+
+    # Toast anything fired since this session last looked
+    latest_seq = alerts.seq
+    seen = st.session_state.setdefault("alerts_seen", latest_seq)
+    for a in reversed([a for a in feed_alerts if a["seq"] > seen][:5]):
+        st.toast(f"{a['rule']}: {a['message']}", icon="🔔")
+    st.session_state["alerts_seen"] = latest_seq
+
+    if not feed_alerts:
+        st.caption(f"No alerts yet · {len(alerts.compiled)} rules · watermark {alerts.watermark or '—'}")
+    for a in feed_alerts:
+        color = {"UPGRADE": "#00e676", "DOWNGRADE": "#ff6d00"}.get(a["kind"], "#00e5ff")
+        st.markdown(f"""
+        <div style="padding:5px 8px;margin-bottom:4px;background:#0d1821;border-left:2px solid {color};
+                    border-radius:3px;font-size:9px;line-height:1.5;">
+          <span style="color:#546e7a;">{escape(a['date'])} · {escape(a['rule'])}</span><br>
+          <span style="color:#eceff1;">{escape(a['message'])}</span>
+        </div>
+        """, unsafe_allow_html=True)
+    if alerts.last_error:
+        st.caption(f"⚠️ Delivery: {alerts.last_error}")
+
+    with st.expander("Manage alert rules"):
+        al_field = st.selectbox("Field", list(CATEGORICAL_FIELDS) + ALERT_NUMERIC_FIELDS, key="al_field")
+        rule = {"owner": al_owner or None, "field": al_field}
+        if al_field in CATEGORICAL_FIELDS:
+            levels = CATEGORICAL_FIELDS[al_field][0] or sorted(snap[al_field].dropna().astype(str).str.upper().unique())
+            rule["to"] = st.selectbox("Becomes", list(levels), key="al_to")
+        else:
+            al_op = st.radio("Crosses", ["below", "above"], horizontal=True, key="al_op")
+            rule[al_op] = st.number_input("Threshold", value=1.0 if al_field == "sector_penalty" else 0.5,
+                                          key="al_value")
+        if al_field != "final_regime":
+            al_scope = st.text_input("Symbols or sectors", "", placeholder="NVDA, AMD  ·  or  Technology · blank = all",
+                                     key="al_scope")
+            entries = [e.strip() for e in al_scope.split(",") if e.strip()]
+            known_sectors = {str(x).lower() for x in snap.get("sector", pd.Series(dtype=str)).dropna()}
+            rule["sectors"] = [e for e in entries if e.lower() in known_sectors]
+            rule["symbols"] = [e.upper() for e in entries if e.lower() not in known_sectors]
+        rule = {k: v for k, v in rule.items() if v not in (None, [])}
+
+        if st.button("Add rule", use_container_width=True, key="al_add"):
+            rule["id"] = f"{al_owner or 'rule'}-{uuid.uuid4().hex[:12]}"
+            try:
+                alerts.set_rules(update_rules(lambda rules: rules + [rule]))
+                st.success(f"Added {rule['id']}")
+            except ValueError as e:
+                st.error(str(e))
+
+        rules = load_rules()
+        mine = [r["id"] for r in rules if not al_owner or r.get("owner") == al_owner]
+        if mine:
+            drop = st.multiselect("Rules", mine, key="al_drop", placeholder="select rules to delete")
+            if drop and st.button("Delete selected", use_container_width=True, key="al_delete"):
+                alerts.set_rules(update_rules(lambda rules: [r for r in rules if r["id"] not in drop]))
+                st.rerun()
+
 
 # ─────────────────────────────────────────────
 # FOOTER
@@ -987,3 +1258,18 @@ st.markdown("""
   <span>⚡ HALF-KELLY ✓  &nbsp;·&nbsp; 20% VOL CAP ✓  &nbsp;·&nbsp; SECTOR PENALTY ✓  &nbsp;·&nbsp; TIERED EXITS ✓</span>
 </div>
 """, unsafe_allow_html=True)
+router = db_router()
+# ▶ marks the endpoints this page's snapshot and history were read from
+served = {snap.attrs.get("endpoint"), history.endpoint}
+read_endpoints = " &nbsp;·&nbsp; ".join(
+    f"{'▶ ' if name in served else ''}{h['role']} {name} "
+    f"{'⚠ lag' if h['lagging'] else '✗' if h['failures'] else '✓'} {h['served']}"
+    for name, h in router.status().items()
+)
+st.markdown(f"""
+<div style="padding:0 4px 8px 4px;font-size:9px;color:#37474f;letter-spacing:0.1em;">
+  ⏱ FIRST KPI {first_kpi_secs:.2f}s &nbsp;·&nbsp; FULL HISTORY {full_load_secs:.2f}s
+  (history fetch {history_secs:.2f}s, concurrent)
+  <br>🗄 READS {read_endpoints}
+</div>
+""", unsafe_allow_html=True)
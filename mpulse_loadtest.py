@@ -0,0 +1,589 @@
+"""
+mPulseInsight — concurrent-session load test
+Drives mpulse_insight.py headlessly through Streamlit's app-testing API:
+N sessions in parallel, each replaying a random mix of sidebar slider moves,
+ticker picks, tab-widget changes and refresh clicks against synthetic data.
+Reports rerun latency percentiles per interaction, process RSS per session
+and database query counts, and exits non-zero when an SLO is missed.
+
+    python mpulse_loadtest.py --sessions 8 --steps 20
+    python mpulse_loadtest.py --sessions 16 --symbols 1500 --days 250 --slo-p95 2.5
+    python mpulse_loadtest.py --secrets loadtest.toml --seed-db  # empty local Postgres
+    python mpulse_loadtest.py --replicas 2                        # exercise read routing
+    python mpulse_loadtest.py --replicas 2 --down replica-1 --lag replica-2=3  # failover drill
+
+By default the data layer is pointed at an on-disk stand-in that answers the
+dashboard's queries from a pickled synthetic history. With --secrets it talks
+to a real (local) Postgres instead; --seed-db creates and fills the table there.
+A `replicas` list in that secrets file (e.g. a second local instance) is
+routed like production, and the report shows which endpoint served what.
+On the stand-in, --down and --lag run failover drills: the named endpoints
+(primary, replica-1, ...) refuse connections or report a stale tradedate.
+
+All sessions share one process, like one Streamlit worker behind the load
+balancer: st.cache_data / st.cache_resource are shared, session state is not.
+Streamlit renders every tab body on each rerun, so a "tab" step is a change
+to a widget inside a tab rather than a client-side switch.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+import mpulse_data
+from mpulse_data import LAG_QUERY, SECTOR_VIEW, TABLE, connect, endpoint_name, load_credentials
+from mpulse_signals import map_distinct, signal_class
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mpulse_insight.py")
+
+# Relative frequency of each interaction in a session
+ACTIONS = {"lookback": 4, "min_score": 2, "search": 3, "ticker": 4, "tab": 4, "refresh": 1}
+
+
+# ─────────────────────────────────────────────
+# SYNTHETIC DATA
+# ─────────────────────────────────────────────
+SECTORS = ["Technology", "Health Care", "Financials", "Energy", "Industrials",
+           "Consumer Discretionary", "Utilities", "Materials"]
+SIGNALS = ["⚡ HIGH CONVICTION BUY", "BULLISH", "NEUTRAL", "BEARISH", "AVOID"]
+SIGNALS_60D = ["🛡️ STRUCTURAL BUY", "NEUTRAL", "EXHAUSTED", "AVOID"]
+ACTIONS_EXEC = ["ENTER", "ACCUMULATE", "WAIT", "LOCK GAINS", "EXIT"]
+STANCES = ["CORE_LONG", "TACTICAL", "DEFENSIVE", "FLAT"]
+REGIMES = ["RISK_ON", "NEUTRAL", "RISK_OFF", "CRASH"]
+
+
+def _sticky_codes(rng, n_days, n_symbols, n_levels, stay=0.85):
+    """(day × symbol) codes that persist day to day with probability `stay`, like real signals."""
+    codes = rng.integers(0, n_levels, (n_days, n_symbols))
+    keep = rng.random((n_days, n_symbols)) < stay
+    for d in range(1, n_days):
+        codes[d] = np.where(keep[d], codes[d - 1], codes[d])
+    return codes.ravel()
+
+
+def synthetic_history(n_symbols=500, n_days=250, seed=0):
+    """Execution history shaped like mpulse_execution_results, newest tradedate first."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    symbols = np.array([f"SYM{i:04d}" for i in range(n_symbols)])
+    n = n_days * n_symbols
+
+    def per_day(values):
+        return np.repeat(values, n_symbols)
+
+    hybrid = np.clip(rng.normal(0.55, 0.18, n), 0, 1)
+    weight = np.where(hybrid > 0.6, rng.random(n) * 0.06, 0.0)
+    df = pd.DataFrame({
+        "tradedate":        per_day(dates),
+        "symbol":           np.tile(symbols, n_days),
+        "sector":           np.tile(np.array(SECTORS)[np.arange(n_symbols) % len(SECTORS)], n_days),
+        "rank":             np.argsort(np.argsort(-hybrid.reshape(n_days, n_symbols), axis=1), axis=1).ravel() + 1,
+        "signal":           np.array(SIGNALS)[_sticky_codes(rng, n_days, n_symbols, len(SIGNALS))],
+        "signal_60d":       np.array(SIGNALS_60D)[_sticky_codes(rng, n_days, n_symbols, len(SIGNALS_60D), 0.95)],
+        "action":           np.array(ACTIONS_EXEC)[_sticky_codes(rng, n_days, n_symbols, len(ACTIONS_EXEC))],
+        "execution_stance": np.array(STANCES)[_sticky_codes(rng, n_days, n_symbols, len(STANCES))],
+        "suggested_action": "REVIEW",
+        "action_60d":       "HOLD",
+        "s_hybrid":         hybrid,
+        "s_structural":     np.clip(hybrid + rng.normal(0, 0.1, n), 0, 1),
+        "final_weight":     weight,
+        "final_dollars":    weight * 1_000_000,
+        "target_pct":       weight * 100,
+        "kelly_fraction":   rng.random(n) * 0.5,
+        "sector_weight":    rng.random(n) * 0.3,
+        "sector_penalty":   np.where(rng.random(n) < 0.1, 0.5, 1.0),
+        "final_regime":     per_day(np.array(REGIMES)[_sticky_codes(rng, n_days, 1, len(REGIMES), 0.9)]),
+        "vix":              per_day(rng.uniform(11, 35, n_days)),
+        "spx":              per_day(rng.uniform(4800, 5600, n_days)),
+        "spx_200dma":       5100.0,
+    })
+    for col in ("f_score", "gv_score", "smart_money_score", "analyst_score", "pipeline_score"):
+        df[col] = rng.random(n) * 100
+    for col in ("risk_score", "beta", "vol_scale", "w_kelly", "w_vol", "s_sector",
+                "w_final_pre_sector", "sector_strength"):
+        df[col] = rng.random(n)
+    df["notes"] = ("Regime " + df["final_regime"] + ": " + df["action"] + " on " + df["signal"]
+                   + ", kelly " + df["kelly_fraction"].round(3).astype(str))
+    return df.sort_values(["tradedate", "rank"], ascending=[False, True], ignore_index=True)
+
+
+# ─────────────────────────────────────────────
+# QUERY ACCOUNTING
+# ─────────────────────────────────────────────
+def query_kind(sql):
+    """Bucket a data-layer query for the report."""
+    s = " ".join(sql.split()).upper()
+    if "TO_REGCLASS" in s or s.startswith("SELECT (SELECT MAX") or "LIMIT 0" in s or "DISTINCT TRADEDATE" in s:
+        return "catalog"
+    if "GROUP BY" in s or SECTOR_VIEW.upper() in s:
+        return "sector_rollups"
+    if "MAX(TRADEDATE)" in s:
+        return "latest"
+    if "SYMBOL = " in s:
+        return "symbol_detail"
+    return "history"
+
+
+class QueryLog:
+    def __init__(self):
+        self.counts = Counter()
+        self.rows = Counter()
+        self.secs = Counter()
+        self.endpoints = Counter()  # (endpoint, kind) → queries served
+        self._lock = threading.Lock()
+
+    def record(self, kind, rows, secs, endpoint=None):
+        with self._lock:
+            self.counts[kind] += 1
+            self.rows[kind] += max(rows, 0)
+            self.secs[kind] += secs
+            self.endpoints[endpoint, kind] += 1
+
+
+class _CountingCursor:
+    """psycopg2 cursor wrapper that logs every execute()."""
+
+    def __init__(self, cur, log, endpoint):
+        self._cur, self._log, self._endpoint = cur, log, endpoint
+
+    def execute(self, sql, params=None):
+        t0 = time.perf_counter()
+        self._cur.execute(sql, params)
+        self._log.record(query_kind(sql), self._cur.rowcount, time.perf_counter() - t0, self._endpoint)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._cur.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class _CountingConnection:
+    def __init__(self, conn, log, endpoint):
+        self._conn, self._log, self._endpoint = conn, log, endpoint
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs), self._log, self._endpoint)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def counting_connect(log, connect_fn=connect):
+    return lambda creds: _CountingConnection(connect_fn(creds), log, endpoint_name(creds))
+
+
+def seed_postgres(creds, df):
+    """Create mpulse_execution_results in an empty database and COPY `df` into it."""
+    pg_types = {"M": "date", "i": "integer", "f": "double precision"}
+    conn = connect(creds)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s)", (TABLE,))
+            if cur.fetchone()[0] is not None:
+                raise SystemExit(f"{TABLE} already exists; --seed only writes to an empty database")
+            cols = ", ".join(f"{c} {pg_types.get(df[c].dtype.kind, 'text')}" for c in df.columns)
+            cur.execute(f"CREATE TABLE {TABLE} ({cols})")
+            buf = io.StringIO()
+            df.to_csv(buf, index=False, header=False, date_format="%Y-%m-%d")
+            buf.seek(0)
+            cur.copy_expert(f"COPY {TABLE} FROM STDIN WITH (FORMAT csv)", buf)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ─────────────────────────────────────────────
+# ON-DISK STAND-IN
+# ─────────────────────────────────────────────
+class StandInDatabase:
+    """Answers the data layer's queries from a pickled history, with optional per-query latency.
+
+    Shaped like a DB-API connection factory so run_query / fetch_latest /
+    pd.read_sql run unchanged. The rollup views are reported as absent, so
+    the base-table fallbacks are what gets exercised. Every endpoint serves
+    the same data; for failover drills, endpoints named in `down` refuse
+    connections and `lag` (endpoint → days) holds back what the replica lag
+    check sees.
+    """
+
+    def __init__(self, path, log, latency=0.0):
+        self.df = pd.read_pickle(path)
+        self.log = log
+        self.latency = latency
+        self.down = set()
+        self.lag = {}
+
+    def connect(self, creds):
+        endpoint = endpoint_name(creds)
+        if endpoint in self.down:
+            raise psycopg2.OperationalError(f"could not connect to server {endpoint}")
+        return _StandInConnection(self, endpoint)
+
+    def answer(self, sql, params, endpoint=None):
+        kind = query_kind(sql)
+        s = " ".join(sql.split()).upper()
+        df = self.df
+        params = params or {}
+        if s == " ".join(LAG_QUERY.split()).upper():
+            out = pd.DataFrame({"max": [df["tradedate"].max() - pd.Timedelta(days=self.lag.get(endpoint, 0))]})
+        elif "TO_REGCLASS" in s:
+            out = pd.DataFrame({"to_regclass": [None]})
+        elif "DISTINCT TRADEDATE" in s:
+            recent = np.sort(df["tradedate"].unique())[::-1][:params["n"]]
+            out = pd.DataFrame({"min": [pd.Timestamp(recent.min()) if len(recent) else None]})
+        elif "LIMIT 0" in s:
+            out = df.iloc[:0]
+        elif kind == "latest":
+            out = df[df["tradedate"] == df["tradedate"].max()]
+        elif kind == "sector_rollups":
+            work = df[df["tradedate"] >= pd.Timestamp(params["since"])]
+            cls = map_distinct(work["signal"], signal_class)
+            out = (work.assign(sector=work["sector"].fillna("Unknown"),
+                               bull=cls.eq("Bullish"), bear=cls.eq("Bearish"))
+                   .groupby(["tradedate", "sector"])
+                   .agg(total=("symbol", "size"), bullish=("bull", "sum"), bearish=("bear", "sum"),
+                        avg_hybrid=("s_hybrid", "mean"), total_dollars=("final_dollars", "sum"))
+                   .reset_index())
+        else:
+            # history_query(): column list, symbol / start <= tradedate < end
+            mask = pd.Series(True, index=df.index)
+            if "symbol" in params:
+                mask &= df["symbol"] == params["symbol"]
+            if "start" in params:
+                mask &= df["tradedate"] >= pd.Timestamp(params["start"])
+            if "end" in params:
+                mask &= df["tradedate"] < pd.Timestamp(params["end"])
+            select = sql[sql.upper().index("SELECT") + 6:sql.upper().index(" FROM ")].strip()
+            out = df[mask] if select == "*" else df.loc[mask, [c.strip() for c in select.split(",")]]
+        return kind, list(out.columns), list(out.itertuples(index=False, name=None))
+
+
+class _StandInCursor:
+    def __init__(self, db, endpoint):
+        self.db = db
+        self.endpoint = endpoint
+        self.description = None
+        self.rowcount = -1
+        self.itersize = 2000
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        t0 = time.perf_counter()
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        kind, columns, self._rows = self.db.answer(sql, params, self.endpoint)
+        self.description = [(c, None, None, None, None, None, None) for c in columns]
+        self.rowcount = len(self._rows)
+        self.db.log.record(kind, self.rowcount, time.perf_counter() - t0, self.endpoint)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=None):
+        size = size or self.itersize
+        out, self._rows = self._rows[:size], self._rows[size:]
+        return out
+
+    def fetchall(self):
+        out, self._rows = self._rows, []
+        return out
+
+    def close(self):
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _StandInConnection:
+    def __init__(self, db, endpoint):
+        self.db = db
+        self.endpoint = endpoint
+
+    def cursor(self, *args, **kwargs):
+        return _StandInCursor(self.db, self.endpoint)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# ─────────────────────────────────────────────
+# SESSIONS
+# ─────────────────────────────────────────────
+def _find(elements, label=None, key=None):
+    for w in elements:
+        if (label is not None and w.label == label) or (key is not None and w.key == key):
+            return w
+    return None
+
+
+def _interact(at, action, rng):
+    """Apply one interaction to the session's widgets; returns False if it had nothing to act on."""
+    if action == "lookback":
+        w, value = _find(at.slider, label="Signal lookback (days)"), rng.choice([1, 5, 10, 20, 30, 60])
+    elif action == "min_score":
+        w, value = _find(at.slider, label="Min S_hybrid score"), rng.choice([0.0, 0.2, 0.4, 0.6])
+    elif action == "search":
+        w, value = _find(at.text_input, label="Ticker / Sector"), rng.choice(["", "", "SYM00", "TECHNOLOGY"])
+    elif action == "ticker":
+        picks = [w for w in at.selectbox
+                 if w.label in ("Select ticker", "Select asset for deep analysis") and w.options]
+        w = rng.choice(picks) if picks else None
+        value = rng.choice(w.options) if w else None
+    elif action == "tab":
+        picks = [w for w in list(at.selectbox) + list(at.slider)
+                 if w.key in ("cf_since", "cf_tm_field", "bt_days", "pf_days")]
+        w = rng.choice(picks) if picks else None
+        if w is None:
+            value = None
+        elif w.key == "bt_days":
+            value = rng.choice([10, 30, 60, 90])
+        elif w.key == "pf_days":
+            value = rng.randint(w.min, w.max)
+        else:
+            value = rng.choice(w.options)
+    elif action == "refresh":
+        w = _find(at.button, label="🔄 Refresh Data")
+        if w is None:
+            return False
+        w.click()
+        return True
+    else:
+        raise ValueError(action)
+    if w is None:
+        return False
+    w.set_value(value)
+    return True
+
+
+def run_session(session_id, creds, steps, seed, think=0.0, timeout=300):
+    """One simulated user; returns [(action, seconds, ok)]."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 1009 + session_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets["postgres"] = creds
+    results = []
+
+    def timed(action):
+        t0 = time.perf_counter()
+        try:
+            at.run()
+            ok = not at.exception
+        except Exception:
+            ok = False
+        results.append((action, time.perf_counter() - t0, ok))
+
+    timed("initial")
+    names, weights = zip(*ACTIONS.items())
+    for _ in range(steps):
+        if think:
+            time.sleep(rng.expovariate(1 / think))
+        action = rng.choices(names, weights)[0]
+        if _interact(at, action, rng):
+            timed(action)
+    return results
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True, name="mpulse-loadtest-rss")
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def load_test(creds, sessions=8, steps=20, seed=0, think=0.0):
+    """Run `sessions` users concurrently; returns (latencies by action, error count, memory stats)."""
+    baseline = _rss_bytes()
+    sampler = MemorySampler()
+    sampler.start()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="mpulse-session") as pool:
+        futures = [pool.submit(run_session, i, creds, steps, seed, think) for i in range(sessions)]
+        runs = [f.result() for f in futures]
+    sampler.stop()
+
+    latencies = defaultdict(list)
+    errors = 0
+    for results in runs:
+        for action, secs, ok in results:
+            latencies[action].append(secs)
+            errors += not ok
+    memory = {"baseline": baseline, "peak": sampler.peak, "end": _rss_bytes(),
+              "per_session": max(sampler.peak - baseline, 0) / sessions}
+    return dict(latencies), errors, memory
+
+
+# ─────────────────────────────────────────────
+# REPORT
+# ─────────────────────────────────────────────
+def summarize(latencies):
+    """{action: {n, p50, p95, p99, max}} plus an "all" row, in seconds."""
+    rows = dict(latencies)
+    rows["all"] = [s for secs in latencies.values() for s in secs]
+    out = {}
+    for action, secs in rows.items():
+        if secs:
+            p50, p95, p99 = np.percentile(secs, [50, 95, 99])
+            out[action] = {"n": len(secs), "p50": p50, "p95": p95, "p99": p99, "max": max(secs)}
+    return out
+
+
+def print_report(stats, errors, memory, log, header, out=sys.stdout):
+    mb = 1024 * 1024
+    print(header, file=out)
+    print(f"\n{'interaction':<12}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}", file=out)
+    for action, s in stats.items():
+        print(f"{action:<12}{s['n']:>6}{s['p50']:>8.3f}s{s['p95']:>8.3f}s{s['p99']:>8.3f}s{s['max']:>8.3f}s",
+              file=out)
+    print(f"\nmemory   baseline {memory['baseline'] / mb:.0f} MB · peak {memory['peak'] / mb:.0f} MB"
+          f" · end {memory['end'] / mb:.0f} MB · ~{memory['per_session'] / mb:.1f} MB per session", file=out)
+    print("queries  " + (" · ".join(f"{k} {log.counts[k]} ({log.rows[k]:,} rows, {log.secs[k]:.2f}s)"
+                                    for k in sorted(log.counts)) or "none"), file=out)
+    served = Counter()
+    for (endpoint, _), n in log.endpoints.items():
+        served[endpoint] += n
+    if len(served) > 1:
+        print("served   " + " · ".join(f"{e} {n}" for e, n in served.most_common()), file=out)
+    print(f"errors   {errors}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the mPulse dashboard.")
+    parser.add_argument("--sessions", type=int, default=8, help="parallel sessions (default: 8)")
+    parser.add_argument("--steps", type=int, default=20, help="interactions per session after the first run")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between steps, seconds")
+    parser.add_argument("--seed", type=int, default=0, help="interaction and data seed")
+    parser.add_argument("--symbols", type=int, default=500, help="synthetic universe size")
+    parser.add_argument("--days", type=int, default=250, help="synthetic tradedates")
+    parser.add_argument("--standin", help="pickled history for the on-disk stand-in (generated if missing)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="stand-in: seconds added per query")
+    parser.add_argument("--replicas", type=int, default=0, help="stand-in: read replicas to route across")
+    parser.add_argument("--down", action="append", default=[], metavar="ENDPOINT",
+                        help="stand-in drill: endpoint (primary, replica-N) refusing connections; repeatable")
+    parser.add_argument("--lag", action="append", default=[], metavar="ENDPOINT=DAYS",
+                        help="stand-in drill: replica-N whose latest tradedate trails by DAYS; repeatable")
+    parser.add_argument("--secrets", help="secrets.toml of a local Postgres to test against instead")
+    parser.add_argument("--seed-db", dest="seed_db", action="store_true",
+                        help="with --secrets: create and fill the table with synthetic data first")
+    parser.add_argument("--slo-p95", type=float, help="fail if p95 rerun latency exceeds this, seconds")
+    parser.add_argument("--slo-rss-mb", type=float, help="fail if memory per session exceeds this, MB")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    if args.secrets and (args.down or args.lag):
+        parser.error("--down / --lag drill the stand-in; they don't apply with --secrets")
+
+    def standin_endpoint(name):
+        if name == "primary":
+            return "stand-in:0"
+        if name.startswith("replica-") and name[8:].isdigit() and 1 <= int(name[8:]) <= args.replicas:
+            return f"stand-in-{name}:0"
+        parser.error(f"unknown endpoint {name!r}: use primary or replica-1..replica-{args.replicas}")
+
+    lag = {}
+    for spec in args.lag:
+        name, _, days = spec.partition("=")
+        if not days.isdigit():
+            parser.error(f"--lag wants ENDPOINT=DAYS, got {spec!r}")
+        lag[standin_endpoint(name)] = int(days)
+    down = {standin_endpoint(name) for name in args.down}
+
+    # pandas warns on every read_sql through a plain DB-API connection
+    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+    log = QueryLog()
+    if args.secrets:
+        creds = load_credentials(args.secrets)
+        if args.seed_db:
+            seed_postgres(creds, synthetic_history(args.symbols, args.days, args.seed))
+        mpulse_data.connect = counting_connect(log)
+        source = f"postgres {creds['host']}:{creds['port']}/{creds['database']}"
+    else:
+        path = args.standin or os.path.join(tempfile.gettempdir(),
+                                            f"mpulse_loadtest_{args.symbols}x{args.days}_{args.seed}.pkl")
+        if not os.path.exists(path):
+            synthetic_history(args.symbols, args.days, args.seed).to_pickle(path)
+        db = StandInDatabase(path, log, args.db_latency)
+        db.down, db.lag = down, lag
+        mpulse_data.connect = db.connect
+        creds = {"host": "stand-in", "port": 0, "database": path, "user": "loadtest", "password": ""}
+        if args.replicas:
+            creds["replicas"] = [{"host": f"stand-in-replica-{i + 1}"} for i in range(args.replicas)]
+        source = f"stand-in {path} ({len(db.df):,} rows)"
+        if down or lag:
+            source += f" · drill: down {sorted(down) or '—'}, lag {lag or '—'}"
+
+    t0 = time.perf_counter()
+    latencies, errors, memory = load_test(creds, args.sessions, args.steps, args.seed, args.think)
+    stats = summarize(latencies)
+    print_report(stats, errors, memory, log,
+                 f"{args.sessions} sessions × {args.steps} steps · {source} · "
+                 f"{time.perf_counter() - t0:.1f}s wall")
+
+    breaches = []
+    if errors:
+        breaches.append(f"{errors} reruns raised")
+    if args.slo_p95 is not None and stats.get("all", {}).get("p95", 0) > args.slo_p95:
+        breaches.append(f"p95 {stats['all']['p95']:.3f}s > {args.slo_p95}s")
+    if args.slo_rss_mb is not None and memory["per_session"] / 1024 / 1024 > args.slo_rss_mb:
+        breaches.append(f"{memory['per_session'] / 1024 / 1024:.1f} MB per session > {args.slo_rss_mb} MB")
+    for b in breaches:
+        print(f"SLO MISSED  {b}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"sessions": args.sessions, "steps": args.steps, "source": source,
+                       "latency": stats, "memory": memory, "errors": errors, "breaches": breaches,
+                       "queries": {k: {"count": log.counts[k], "rows": log.rows[k], "secs": log.secs[k]}
+                                   for k in log.counts},
+                       "endpoints": [{"endpoint": e, "kind": k, "count": n}
+                                     for (e, k), n in sorted(log.endpoints.items(), key=str)]}, f, indent=2)
+    sys.exit(1 if breaches else 0)
+
+
+if __name__ == "__main__":
+    main()
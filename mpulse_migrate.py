@@ -0,0 +1,109 @@
+"""
+mPulseInsight — schema migrations
+Applies migrations/NNN_*.sql in order, each in its own transaction, and
+records them in mpulse_schema_migrations so re-runs are no-ops.
+
+    python mpulse_migrate.py              apply pending migrations
+    python mpulse_migrate.py --status     list applied / pending
+    python mpulse_migrate.py --refresh    refresh the rollup views (what the writer runs)
+"""
+
+import argparse
+import os
+import re
+import sys
+
+from mpulse_data import SECRETS_PATH, connect, load_credentials
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+LEDGER_DDL = """
+    CREATE TABLE IF NOT EXISTS mpulse_schema_migrations (
+        version    integer PRIMARY KEY,
+        name       text NOT NULL,
+        applied_at timestamptz NOT NULL DEFAULT now()
+    )
+"""
+
+
+def discover(path=MIGRATIONS_DIR):
+    """[(version, name, file path)] sorted by version."""
+    found = []
+    for fname in os.listdir(path):
+        m = re.match(r"(\d+)_(.+)\.sql$", fname)
+        if m:
+            found.append((int(m.group(1)), m.group(2), os.path.join(path, fname)))
+    return sorted(found)
+
+
+def applied_versions(conn):
+    with conn.cursor() as cur:
+        cur.execute(LEDGER_DDL)
+        cur.execute("SELECT version FROM mpulse_schema_migrations")
+        versions = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return versions
+
+
+def migrate(creds, path=MIGRATIONS_DIR, out=sys.stdout):
+    """Apply every pending migration; returns the versions applied."""
+    conn = connect(creds)
+    try:
+        done = applied_versions(conn)
+        applied = []
+        for version, name, fpath in discover(path):
+            if version in done:
+                continue
+            with open(fpath) as f:
+                sql = f.read()
+            with conn.cursor() as cur:
+                try:
+                    cur.execute(sql)
+                    cur.execute("INSERT INTO mpulse_schema_migrations (version, name) VALUES (%s, %s)",
+                                (version, name))
+                except Exception:
+                    conn.rollback()
+                    raise
+            conn.commit()
+            applied.append(version)
+            print(f"applied {version:03d}_{name}", file=out)
+        return applied
+    finally:
+        conn.close()
+
+
+def refresh_rollups(creds):
+    conn = connect(creds)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT mpulse_refresh_rollups()")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply mPulse schema migrations.")
+    parser.add_argument("--secrets", default=SECRETS_PATH, help="secrets.toml with a [postgres] block")
+    parser.add_argument("--status", action="store_true", help="show applied / pending migrations and exit")
+    parser.add_argument("--refresh", action="store_true", help="refresh the materialized rollup views")
+    args = parser.parse_args(argv)
+    creds = load_credentials(args.secrets)
+
+    if args.status:
+        conn = connect(creds)
+        try:
+            done = applied_versions(conn)
+        finally:
+            conn.close()
+        for version, name, _ in discover():
+            print(f"{'applied' if version in done else 'pending'}  {version:03d}_{name}")
+    elif args.refresh:
+        refresh_rollups(creds)
+        print("rollup views refreshed")
+    elif not migrate(creds):
+        print("schema up to date")
+
+
+if __name__ == "__main__":
+    main()
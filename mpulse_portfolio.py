@@ -0,0 +1,157 @@
+"""
+mPulseInsight — allocation analytics
+Daily turnover, exposure, concentration, sector drift and position-cap usage
+over the full final_weight / final_dollars history.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from mpulse_signals import date_digests, unchanged_prefix
+
+POSITION_CAP = 0.05   # 5% max per position
+CAP_TOLERANCE = 1e-4  # weights within this of the cap count as capped
+
+DAILY_COLUMNS = ["positions", "gross_weight", "net_weight", "gross_dollars", "net_dollars",
+                 "turnover", "traded_dollars", "hhi", "effective_n", "cap_bound", "cap_bind_rate",
+                 "avg_kelly", "max_sector_weight", "sector_drift", "sector_weight_drift"]
+DIGEST_COLUMNS = ("final_weight", "final_dollars", "kelly_fraction", "sector", "sector_weight")
+
+
+def _matrix(df, column, dates, symbols):
+    """(date × symbol) matrix of `column`, 0 where a symbol has no row."""
+    out = np.zeros((len(dates), len(symbols)))
+    if column not in df.columns:
+        return out
+    di = pd.Index(dates).get_indexer(df["date_str"])
+    si = pd.Index(symbols).get_indexer(df["symbol"])
+    keep = (di >= 0) & (si >= 0)
+    vals = pd.to_numeric(df[column], errors="coerce").fillna(0).to_numpy()
+    out[di[keep], si[keep]] = vals[keep]
+    return out
+
+
+def _half_l1_step(frame):
+    """0.5 · Σ|x_t − x_{t−1}| across columns; NaN for the first row."""
+    return 0.5 * frame.diff().abs().sum(axis=1, min_count=1)
+
+
+def daily_allocation_metrics(df):
+    """Per-date allocation metrics for every date in `df`.
+
+    Returns (daily, sector_exposure, sector_weights): `daily` is indexed by
+    date_str with DAILY_COLUMNS; the other two are (date × sector) frames of
+    summed final_weight and mean sector_weight.
+    """
+    dates = np.sort(df["date_str"].dropna().unique())
+    symbols = np.sort(df["symbol"].dropna().unique())
+    w = _matrix(df, "final_weight", dates, symbols)
+    dollars = _matrix(df, "final_dollars", dates, symbols)
+    kelly = _matrix(df, "kelly_fraction", dates, symbols)
+
+    gross = np.abs(w).sum(axis=1)
+    held = w > 0
+    n_held = held.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.abs(w) / gross[:, None]
+        hhi = np.where(gross > 0, (shares ** 2).sum(axis=1), np.nan)
+        capped = (w >= POSITION_CAP - CAP_TOLERANCE).sum(axis=1)
+        avg_kelly = np.where(n_held > 0, (kelly * held).sum(axis=1) / n_held, np.nan)
+
+    daily = pd.DataFrame({
+        "positions":     n_held,
+        "gross_weight":  gross,
+        "net_weight":    w.sum(axis=1),
+        "gross_dollars": np.abs(dollars).sum(axis=1),
+        "net_dollars":   dollars.sum(axis=1),
+        "hhi":           hhi,
+        "cap_bound":     capped,
+        "avg_kelly":     avg_kelly,
+    }, index=pd.Index(dates, name="date_str"))
+    daily["turnover"] = _half_l1_step(pd.DataFrame(w, index=daily.index))
+    daily["traded_dollars"] = pd.DataFrame(dollars, index=daily.index).diff().abs().sum(axis=1, min_count=1)
+    daily["effective_n"] = 1 / daily["hhi"]
+    daily["cap_bind_rate"] = daily["cap_bound"] / daily["positions"].where(daily["positions"] > 0)
+
+    if "sector" in df.columns:
+        sector_exposure = (df.groupby(["date_str", "sector"])["final_weight"].sum()
+                           .unstack(fill_value=0.0).reindex(dates, fill_value=0.0)
+                           if "final_weight" in df.columns else pd.DataFrame(index=dates))
+        sector_weights = (df.groupby(["date_str", "sector"])["sector_weight"].mean()
+                          .unstack().reindex(dates)
+                          if "sector_weight" in df.columns else pd.DataFrame(index=dates))
+    else:
+        sector_exposure = sector_weights = pd.DataFrame(index=dates)
+    sector_exposure.index.name = sector_weights.index.name = "date_str"
+    daily["max_sector_weight"] = sector_exposure.max(axis=1) if sector_exposure.shape[1] else np.nan
+    daily["sector_drift"] = _half_l1_step(sector_exposure) if sector_exposure.shape[1] else np.nan
+    daily["sector_weight_drift"] = _half_l1_step(sector_weights) if sector_weights.shape[1] else np.nan
+    return daily[DAILY_COLUMNS], sector_exposure, sector_weights
+
+
+class AllocationAnalytics:
+    """Per-date allocation metrics, computed once per tradedate and cached.
+
+    A new tradedate is computed against the previous one only; dates already
+    in the cache are recomputed only when their rows are restated, from the
+    first changed date onwards.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.daily = pd.DataFrame(columns=DAILY_COLUMNS)
+        self.sector_exposure = pd.DataFrame()
+        self.sector_weights = pd.DataFrame()
+        self.digests = np.array([], dtype=np.uint64)  # per-date content hash, aligned with dates
+        self.source = None  # (data_version, rows) of the frame last folded in
+
+    def __getstate__(self):
+        # Engines are pickled into the precompute artifact store; locks aren't picklable
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def dates(self):
+        return self.daily.index.to_numpy()
+
+    def update(self, df):
+        """Bring the cache up to date with `df`; returns the number of dates (re)computed."""
+        if df.empty or "date_str" not in df.columns:
+            return 0
+        with self._lock:
+            source = (df.attrs.get("data_version"), len(df))
+            if source[0] is not None and source == self.source:
+                return 0
+            df_dates = np.sort(df["date_str"].dropna().unique())
+            digests = date_digests(df, df_dates, DIGEST_COLUMNS)
+            known = unchanged_prefix(self.dates, self.digests, df_dates, digests)
+            if known:
+                self.daily = self.daily.iloc[:known]
+                self.sector_exposure = self.sector_exposure.iloc[:known]
+                self.sector_weights = self.sector_weights.iloc[:known]
+                new_dates = df_dates[known:]
+                if len(new_dates):
+                    # Include the last cached date so turnover / drift have a prior row
+                    window = df[df["date_str"].isin(np.concatenate([self.dates[-1:], new_dates]))]
+                    daily, sec_exp, sec_w = daily_allocation_metrics(window)
+                    self.daily = pd.concat([self.daily, daily.iloc[1:]])
+                    self.sector_exposure = pd.concat([self.sector_exposure, sec_exp.iloc[1:]]).fillna(0.0)
+                    self.sector_weights = pd.concat([self.sector_weights, sec_w.iloc[1:]])
+            else:
+                new_dates = df_dates
+                self.daily, self.sector_exposure, self.sector_weights = daily_allocation_metrics(df)
+            self.digests, self.source = digests, source
+            return len(new_dates)
+
+    def window(self, since=None):
+        """(daily, sector_exposure) for dates after `since` (exclusive)."""
+        if since is None:
+            return self.daily, self.sector_exposure
+        return self.daily[self.daily.index > since], self.sector_exposure[self.sector_exposure.index > since]
@@ -0,0 +1,309 @@
+"""
+mPulseInsight — background precompute
+Fans the heavy derived views out to a process pool as soon as a new history
+is loaded, and publishes them atomically into an on-disk artifact store.
+Readers only ever see complete versions, as pickled frames and engines;
+a version is pruned only while nobody holds a read lock on its manifest.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking; pruning may race a reader
+    fcntl = None
+
+import pandas as pd
+
+from mpulse_data import STATE_ROOT, private_dir
+from mpulse_portfolio import AllocationAnalytics
+from mpulse_regimes import RegimeStatistics
+from mpulse_transitions import TransitionEngine
+from mpulse_views import MATRIX_MAX_DAYS, data_version, factor_trends, sector_rollups, signal_pivots
+
+ARTIFACT_DIR = os.environ.get("MPULSE_ARTIFACT_DIR", os.path.join(STATE_ROOT, "artifacts"))
+KEEP_VERSIONS = 3
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+
+
+# ─────────────────────────────────────────────
+# JOBS — each reads the staged input and writes its own artifacts
+# ─────────────────────────────────────────────
+def _dump(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_previous(prev_dir, name):
+    """The previous version's engine to extend, or None to build from scratch.
+
+    Engines re-check every date they hold against per-date digests and
+    recompute restated ones, so extending is safe after a restatement.
+    """
+    if not prev_dir:
+        return None
+    try:
+        with _reading(prev_dir):
+            return pd.read_pickle(os.path.join(prev_dir, f"{name}.pkl"))
+    except Exception:
+        return None
+
+
+def job_sector_rollups(df, out_dir, prev_dir):
+    _dump(sector_rollups(df), os.path.join(out_dir, "sector_rollups.pkl"))
+
+
+def job_transitions(df, out_dir, prev_dir):
+    """Extend the previous version's engine from the first new or restated date."""
+    engine = _load_previous(prev_dir, "transitions") or TransitionEngine()
+    engine.update(df)
+    _dump(engine, os.path.join(out_dir, "transitions.pkl"))
+
+
+def job_allocation(df, out_dir, prev_dir):
+    alloc = _load_previous(prev_dir, "allocation") or AllocationAnalytics()
+    alloc.update(df)
+    _dump(alloc, os.path.join(out_dir, "allocation.pkl"))
+
+
+def job_regime_stats(df, out_dir, prev_dir):
+    stats = _load_previous(prev_dir, "regime_stats") or RegimeStatistics()
+    stats.update(df)
+    _dump(stats, os.path.join(out_dir, "regime_stats.pkl"))
+
+
+def job_factor_trends(df, out_dir, prev_dir):
+    _dump(factor_trends(df), os.path.join(out_dir, "factor_trends.pkl"))
+
+
+def job_signal_pivots(df, out_dir, prev_dir):
+    """Pivots for the widest lookback; every narrower lookback is a column slice."""
+    dates = sorted(df["date_str"].dropna().unique(), reverse=True)[:MATRIX_MAX_DAYS]
+    _dump(signal_pivots(df, dates), os.path.join(out_dir, "signal_pivots.pkl"))
+
+
+JOBS = {
+    "sector_rollups": job_sector_rollups,
+    "transitions":    job_transitions,
+    "allocation":     job_allocation,
+    "regime_stats":   job_regime_stats,
+    "factor_trends":  job_factor_trends,
+    "signal_pivots":  job_signal_pivots,
+}
+
+
+def _run_job(name, input_path, out_dir, prev_dir):
+    """Worker entry point; returns (name, seconds)."""
+    t0 = time.perf_counter()
+    df = pd.read_pickle(input_path)
+    JOBS[name](df, out_dir, prev_dir)
+    return name, time.perf_counter() - t0
+
+
+# ─────────────────────────────────────────────
+# STORE
+# ─────────────────────────────────────────────
+@contextmanager
+def _reading(vdir):
+    """Hold a shared lock on a version's manifest so _prune leaves the directory alone.
+
+    Raises FileNotFoundError if the version was never published or has been pruned.
+    """
+    with open(os.path.join(vdir, MANIFEST)) as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_SH)  # released when the file closes
+        if not os.path.exists(os.path.join(vdir, MANIFEST)):
+            raise FileNotFoundError(vdir)  # pruned while we waited for the lock
+        yield f
+
+
+def current_version(root=ARTIFACT_DIR):
+    """Version id of the last complete publish, or None."""
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def load_artifacts(version, root=ARTIFACT_DIR):
+    """All artifacts of a published version, keyed by name, plus its manifest.
+
+    Raises PermissionError if `root` isn't private to this user (see private_dir).
+    """
+    vdir = os.path.join(private_dir(root), version)
+    out = {}
+    try:
+        with _reading(vdir) as manifest:
+            for fname in os.listdir(vdir):
+                stem, ext = os.path.splitext(fname)
+                if ext == ".pkl":
+                    out[stem] = pd.read_pickle(os.path.join(vdir, fname))
+            out["manifest"] = json.load(manifest)
+    except FileNotFoundError:
+        return None
+    return out
+
+
+def _publish(root, stage, version):
+    """Rename the staged directory into place, then flip CURRENT. Both steps are atomic."""
+    final = os.path.join(root, version)
+    try:
+        os.rename(stage, final)
+    except OSError:
+        # Another worker process published the same version first
+        shutil.rmtree(stage, ignore_errors=True)
+    pointer = os.path.join(root, f".{CURRENT}.{uuid.uuid4().hex}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, CURRENT))
+
+
+def _prune(root, keep):
+    """Remove all but the newest `keep` versions, skipping any a reader currently holds."""
+    current = current_version(root)
+    versions = [d for d in os.listdir(root)
+                if not d.startswith(".") and d != current and os.path.isdir(os.path.join(root, d))]
+    versions.sort(key=lambda d: os.path.getmtime(os.path.join(root, d)), reverse=True)
+    for stale in versions[keep - 1:]:
+        vdir = os.path.join(root, stale)
+        try:
+            with open(os.path.join(vdir, MANIFEST)) as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # Drop the manifest first so readers waiting on the lock see the version as gone
+                os.remove(os.path.join(vdir, MANIFEST))
+        except BlockingIOError:
+            continue  # still being read; the next publish prunes it
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(vdir, ignore_errors=True)
+
+
+def precompute(input_path, version, root=ARTIFACT_DIR, max_workers=None):
+    """Run every job over the pickled history at `input_path` and publish it as `version`.
+
+    Returns the per-job timings. Nothing becomes visible to readers unless
+    every job succeeds.
+    """
+    private_dir(root)
+    if os.path.exists(os.path.join(root, version, MANIFEST)):
+        return {}
+    stage = os.path.join(root, f".stage-{version}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(stage)
+    try:
+        prev = current_version(root)
+        prev_dir = os.path.join(root, prev) if prev else None
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as pool:
+            futures = [pool.submit(_run_job, name, input_path, stage, prev_dir) for name in JOBS]
+            timings = dict(f.result() for f in futures)
+        timings["total"] = time.perf_counter() - t0
+        with open(os.path.join(stage, MANIFEST), "w") as f:
+            json.dump({"version": version, "created": time.time(), "timings": timings}, f)
+        _publish(root, stage, version)
+        _prune(root, KEEP_VERSIONS)
+        return timings
+    except BaseException:
+        shutil.rmtree(stage, ignore_errors=True)
+        raise
+
+
+# Background runs started by any Precomputer in this process (see wait_idle)
+_running = 0
+_idle = threading.Condition()
+
+
+def _track(delta):
+    global _running
+    with _idle:
+        _running += delta
+        _idle.notify_all()
+
+
+def wait_idle(timeout=None):
+    """Block until no background precompute started in this process is running; False on timeout."""
+    with _idle:
+        return _idle.wait_for(lambda: _running == 0, timeout)
+
+
+class Precomputer:
+    """Process-wide precompute coordinator for the dashboard.
+
+    submit() returns immediately. The jobs run in a separate
+    `python -m mpulse_precompute` process that owns the process pool: pool
+    workers started from inside a Streamlit script would re-import the
+    dashboard itself as their __main__.
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, max_workers=None):
+        self.root = root
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self.last_timings = {}
+        self.last_error = None
+        private_dir(root)
+
+    def submit(self, df, version=None):
+        """Start precomputing `df` in the background unless it is already published or running."""
+        version = version or data_version(df)
+        with self._lock:
+            if version in self._inflight or os.path.exists(os.path.join(self.root, version, MANIFEST)):
+                return version
+            self._inflight.add(version)
+        _track(+1)
+        threading.Thread(target=self._run, args=(df, version), daemon=True,
+                         name=f"mpulse-precompute-{version}").start()
+        return version
+
+    def _run(self, df, version):
+        input_path = os.path.join(self.root, f".input-{version}-{uuid.uuid4().hex[:8]}.pickle")
+        try:
+            df.to_pickle(input_path)
+            proc = subprocess.run(
+                [sys.executable, "-m", "mpulse_precompute", input_path,
+                 "--version", version, "--root", self.root, "--workers", str(self.max_workers)],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                self.last_error = (proc.stderr.strip().splitlines() or [f"exit {proc.returncode}"])[-1]
+            else:
+                self.last_timings, self.last_error = json.loads(proc.stdout or "{}"), None
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+        finally:
+            if os.path.exists(input_path):
+                os.remove(input_path)
+            with self._lock:
+                self._inflight.discard(version)
+            _track(-1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute mPulse derived views into the artifact store.")
+    parser.add_argument("input", help="pickled execution-results frame")
+    parser.add_argument("--version", help="version id to publish under (default: content hash)")
+    parser.add_argument("--root", default=ARTIFACT_DIR, help="artifact store directory")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    args = parser.parse_args(argv)
+    version = args.version or data_version(pd.read_pickle(args.input))
+    timings = precompute(args.input, version, args.root, args.workers)
+    print(json.dumps(timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+mPulseInsight — regime-conditioned signal statistics
+How signals behave under each market regime: persistence of each signal
+level, how often an ENTER run ends straight in EXIT, and the s_hybrid /
+kelly_fraction distributions, per (signal, final_regime).
+
+Everything is held as fixed-size accumulators (counts, sums, histograms)
+plus a little per-symbol run state, so a new tradedate folds in without
+rescanning the history. Run state can't be unwound, so a restated date
+rebuilds the accumulators from scratch.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from mpulse_signals import (ACTION_LEVELS, MISSING, REGIME_LEVELS, SIGNAL_LEVELS, date_digests, map_distinct,
+                            regime_key, signal_code_matrix, unchanged_prefix)
+
+VALUE_FIELDS = {"s_hybrid": 20, "kelly_fraction": 40}  # field → histogram bins over [0, 1]
+MAX_RUN = 120  # run lengths at or beyond this land in the last persistence bin
+DIGEST_COLUMNS = ("signal", "action", "final_regime") + tuple(VALUE_FIELDS)
+
+ENTER = ACTION_LEVELS.index("ENTER")
+EXIT = ACTION_LEVELS.index("EXIT")
+
+STAT_COLUMNS = ["signal", "regime", "observations", "runs", "avg_persistence", "median_persistence",
+                "enter_runs", "enter_exit_rate",
+                "s_hybrid_mean", "s_hybrid_p10", "s_hybrid_p50", "s_hybrid_p90",
+                "kelly_fraction_mean", "kelly_fraction_p10", "kelly_fraction_p50", "kelly_fraction_p90"]
+
+
+def _value_matrix(df, column, symbols, dates):
+    sym_pos = pd.Index(symbols).get_indexer(df["symbol"])
+    date_pos = pd.Index(dates).get_indexer(df["date_str"])
+    keep = (sym_pos >= 0) & (date_pos >= 0)
+    matrix = np.full((len(symbols), len(dates)), np.nan)
+    if column in df.columns:
+        matrix[sym_pos[keep], date_pos[keep]] = pd.to_numeric(df[column], errors="coerce").to_numpy()[keep]
+    return matrix
+
+
+def date_regimes(df, dates):
+    """One REGIME_LEVELS code per tradedate (the day's most common final_regime)."""
+    if "final_regime" not in df.columns:
+        return np.full(len(dates), REGIME_LEVELS.index("NEUTRAL"), dtype=np.int8)
+    keys = map_distinct(df["final_regime"], regime_key)
+    modal = keys.groupby(df["date_str"]).agg(lambda s: s.mode().iat[0])
+    codes = modal.reindex(dates).map(REGIME_LEVELS.index).fillna(REGIME_LEVELS.index("NEUTRAL"))
+    return codes.to_numpy().astype(np.int8)
+
+
+def _hist_quantile(hist, q):
+    """Approximate quantile(s) of [0, 1] values from fixed-bin counts (linear within the bin)."""
+    total = hist.sum()
+    if not total:
+        return np.nan
+    cum = np.cumsum(hist)
+    i = int(np.searchsorted(cum, q * total))
+    below = cum[i - 1] if i else 0
+    frac = (q * total - below) / hist[i] if hist[i] else 0.0
+    return (i + frac) / len(hist)
+
+
+def _run_median(hist):
+    """Median run length from run_hist counts (bin i = length i + 1, capped at MAX_RUN)."""
+    total = int(hist.sum())
+    if not total:
+        return np.nan
+    cum = np.cumsum(hist)
+    lo, hi = np.searchsorted(cum, [(total + 1) // 2, total // 2 + 1]) + 1
+    return (lo + hi) / 2
+
+
+class RegimeStatistics:
+    """Per (signal level × regime) accumulators over the full history, extended one tradedate at a time.
+
+    Runs are attributed to the regime on the day they started; runs still
+    open at the newest date are censored and not counted until they end.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def __getstate__(self):
+        # Engines are pickled into the precompute artifact store; locks aren't picklable
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        shape = (len(SIGNAL_LEVELS), len(REGIME_LEVELS))
+        self.dates = np.array([], dtype=object)
+        self.regimes = np.array([], dtype=np.int8)
+        self.symbols = np.array([], dtype=object)
+        self.digests = np.array([], dtype=np.uint64)  # per-date content hash, aligned with dates
+        self.source = None  # (data_version, rows) of the frame last folded in
+        self.observations = np.zeros(shape, dtype=np.int64)
+        self.run_hist = np.zeros(shape + (MAX_RUN,), dtype=np.int64)
+        self.run_total = np.zeros(shape, dtype=np.int64)
+        self.enter_runs = np.zeros(shape, dtype=np.int64)
+        self.enter_exits = np.zeros(shape, dtype=np.int64)
+        self.value_hist = {f: np.zeros(shape + (bins,), dtype=np.int64) for f, bins in VALUE_FIELDS.items()}
+        self.value_sum = {f: np.zeros(shape) for f in VALUE_FIELDS}
+        # Per-symbol state carried from one date to the next
+        self.last_signal = np.array([], dtype=np.int8)
+        self.run_regime = np.array([], dtype=np.int8)
+        self.run_len = np.array([], dtype=np.int64)
+        self.last_action = np.array([], dtype=np.int8)
+        self.enter_key = np.array([], dtype=np.int64)  # flat (signal, regime) index of the open ENTER run
+
+    # ── build / update ──
+    def update(self, df):
+        """Bring the accumulators up to date with `df`; returns the number of dates (re)processed."""
+        if df.empty or "date_str" not in df.columns:
+            return 0
+        with self._lock:
+            source = (df.attrs.get("data_version"), len(df))
+            if source[0] is not None and source == self.source:
+                return 0
+            df_dates = np.sort(df["date_str"].dropna().unique())
+            digests = date_digests(df, df_dates, DIGEST_COLUMNS)
+            known = len(self.dates)
+            if known and unchanged_prefix(self.dates, self.digests, df_dates, digests) == known:
+                new_dates = df_dates[known:]
+                if len(new_dates):
+                    self._fold(df[df["date_str"].isin(new_dates)], new_dates)
+            else:
+                new_dates = df_dates
+                self._reset()
+                self._fold(df, df_dates)
+            self.digests, self.source = digests, source
+            return len(new_dates)
+
+    def _grow(self, symbols):
+        new_syms = np.setdiff1d(np.asarray(symbols, dtype=object), self.symbols)
+        if not len(new_syms):
+            return
+        n = len(new_syms)
+        self.symbols = np.concatenate([self.symbols, new_syms])
+        self.last_signal = np.concatenate([self.last_signal, np.full(n, MISSING, dtype=np.int8)])
+        self.run_regime = np.concatenate([self.run_regime, np.zeros(n, dtype=np.int8)])
+        self.run_len = np.concatenate([self.run_len, np.zeros(n, dtype=np.int64)])
+        self.last_action = np.concatenate([self.last_action, np.full(n, MISSING, dtype=np.int8)])
+        self.enter_key = np.concatenate([self.enter_key, np.full(n, -1, dtype=np.int64)])
+
+    def _fold(self, df, dates):
+        self._grow(df["symbol"].dropna().unique())
+        _, _, signals, _ = signal_code_matrix(df, "signal", list(SIGNAL_LEVELS), self.symbols, dates)
+        _, _, actions, _ = signal_code_matrix(df, "action", list(ACTION_LEVELS), self.symbols, dates)
+        values = {f: _value_matrix(df, f, self.symbols, dates) for f in VALUE_FIELDS}
+        regimes = date_regimes(df, dates)
+        for t in range(len(dates)):
+            self._step(signals[:, t], actions[:, t], int(regimes[t]), {f: v[:, t] for f, v in values.items()})
+        self.dates = np.concatenate([self.dates, dates])
+        self.regimes = np.concatenate([self.regimes, regimes])
+
+    def _step(self, sig, act, regime, values):
+        n_sig, n_reg = self.observations.shape
+        present = sig != MISSING
+        self.observations[:, regime] += np.bincount(sig[present], minlength=n_sig)
+
+        for field, bins in VALUE_FIELDS.items():
+            v = values[field]
+            ok = present & ~np.isnan(v)
+            b = np.clip((v[ok] * bins).astype(np.int64), 0, bins - 1)
+            self.value_hist[field][:, regime] += np.bincount(sig[ok].astype(np.int64) * bins + b,
+                                                             minlength=n_sig * bins).reshape(n_sig, bins)
+            self.value_sum[field][:, regime] += np.bincount(sig[ok], weights=v[ok], minlength=n_sig)
+
+        # Signal runs: close the ones that changed level or dropped out, start / extend the rest
+        prev = self.last_signal
+        ended = (prev != MISSING) & (sig != prev)
+        if ended.any():
+            lengths = np.minimum(self.run_len[ended], MAX_RUN) - 1
+            flat = (prev[ended].astype(np.int64) * n_reg + self.run_regime[ended]) * MAX_RUN + lengths
+            self.run_hist += np.bincount(flat, minlength=self.run_hist.size).reshape(self.run_hist.shape)
+            self.run_total += np.bincount(prev[ended].astype(np.int64) * n_reg + self.run_regime[ended],
+                                          weights=self.run_len[ended],
+                                          minlength=n_sig * n_reg).reshape(n_sig, n_reg).astype(np.int64)
+        started = present & (sig != prev)
+        self.run_regime[started] = regime
+        self.run_len[started] = 1
+        self.run_len[present & ~started] += 1
+        self.run_len[~present] = 0
+        self.last_signal = sig.copy()
+
+        # ENTER runs: how each one ends (EXIT vs anything else); a symbol dropping out ends it unscored
+        was_enter = self.last_action == ENTER
+        scored = was_enter & (act != ENTER) & (act != MISSING) & (self.enter_key >= 0)
+        if scored.any():
+            keys = self.enter_key[scored]
+            self.enter_runs += np.bincount(keys, minlength=n_sig * n_reg).reshape(n_sig, n_reg)
+            self.enter_exits += np.bincount(keys[act[scored] == EXIT],
+                                            minlength=n_sig * n_reg).reshape(n_sig, n_reg)
+        opened = (act == ENTER) & ~was_enter & present
+        self.enter_key[opened] = sig[opened].astype(np.int64) * n_reg + regime
+        self.enter_key[act != ENTER] = -1
+        self.last_action = act.copy()
+
+    # ── queries ──
+    def table(self):
+        """One row per (signal, regime) with persistence, ENTER→EXIT rate and distribution summaries."""
+        rows = []
+        for s, signal in enumerate(SIGNAL_LEVELS):
+            for r, regime in enumerate(REGIME_LEVELS):
+                runs = int(self.run_hist[s, r].sum())
+                row = {
+                    "signal": signal, "regime": regime,
+                    "observations": int(self.observations[s, r]),
+                    "runs": runs,
+                    "avg_persistence": self.run_total[s, r] / runs if runs else np.nan,
+                    "median_persistence": _run_median(self.run_hist[s, r]),
+                    "enter_runs": int(self.enter_runs[s, r]),
+                    "enter_exit_rate": (self.enter_exits[s, r] / self.enter_runs[s, r]
+                                        if self.enter_runs[s, r] else np.nan),
+                }
+                for field in VALUE_FIELDS:
+                    hist = self.value_hist[field][s, r]
+                    n = hist.sum()
+                    row[f"{field}_mean"] = self.value_sum[field][s, r] / n if n else np.nan
+                    for q in (10, 50, 90):
+                        row[f"{field}_p{q}"] = _hist_quantile(hist, q / 100)
+                rows.append(row)
+        return pd.DataFrame(rows, columns=STAT_COLUMNS)
+
+    def pivot(self, column):
+        """(signal × regime) grid of one table() column."""
+        return self.table().pivot(index="signal", columns="regime", values=column) \
+            .reindex(index=list(SIGNAL_LEVELS), columns=list(REGIME_LEVELS))
+
+    def distribution(self, field, signal):
+        """Share of `field` observations per histogram bin (index = bin midpoint), one column per regime."""
+        hist = self.value_hist[field][SIGNAL_LEVELS.index(signal)]
+        bins = hist.shape[-1]
+        totals = hist.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shares = np.where(totals > 0, hist / totals, 0.0)
+        return pd.DataFrame(shares.T, index=(np.arange(bins) + 0.5) / bins, columns=list(REGIME_LEVELS))
+
+    def regime_days(self):
+        """Number of tradedates spent in each regime."""
+        return pd.Series(np.bincount(self.regimes.astype(np.int64), minlength=len(REGIME_LEVELS)),
+                         index=list(REGIME_LEVELS))
@@ -0,0 +1,292 @@
+"""
+mPulseInsight — read-only JSON query service
+Serves the latest snapshot, per-symbol history, sector rollups and the
+signal matrix from one shared in-memory copy of the execution history, so
+notebooks and alerting scripts stop opening their own Postgres connections.
+
+    python mpulse_service.py --port 8502
+
+GET /version                       data version, row count, latest date
+GET /latest?columns=core,factor    latest tradedate (all columns by default)
+GET /history/<SYMBOL>?days=30      one symbol, newest first (older dates paged in from Postgres)
+GET /sectors?date=YYYY-MM-DD       sector breadth rollups (default: latest date)
+GET /matrix?days=5                 signal matrix, symbol × date (days ≤ 60)
+
+Every response carries ETag = data version; send If-None-Match to get a
+304 without a body. Bodies are built once per (path, query, version).
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import namedtuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from mpulse_data import (COLUMN_GROUPS, RECENT_DATES, SECRETS_PATH, display_frame, fetch_symbol_history,
+                         load_credentials, load_history)
+from mpulse_precompute import current_version, load_artifacts
+from mpulse_views import MATRIX_MAX_DAYS, data_version, filter_signal_matrix, sector_rollups, signal_pivots
+
+REFRESH_SECS = 120  # same TTL as the dashboard's load_data cache
+MAX_BODY_CACHE = 512
+
+log = logging.getLogger("mpulse.service")
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# One loaded history and everything derived from it. refresh() swaps in a new
+# Snapshot with a single assignment, so a request never mixes two versions.
+Snapshot = namedtuple("Snapshot", "history df version loaded_at latest_date views bodies fetch_detail")
+
+
+class DataCache:
+    """The one in-memory copy every request is served from, refreshed off the event loop."""
+
+    def __init__(self, creds, refresh_secs=REFRESH_SECS, recent_dates=RECENT_DATES):
+        self.creds = creds
+        self.refresh_secs = refresh_secs
+        self.recent_dates = recent_dates
+        self.snapshot = None  # None until the first load
+
+    def _load(self):
+        history = load_history(self.creds, self.recent_dates)
+        return history, data_version(history.frame, history.wide)
+
+    def fetch_detail(self, symbol, start, end):
+        return fetch_symbol_history(self.creds, symbol, start, end)
+
+    async def refresh(self):
+        loop = asyncio.get_running_loop()
+        history, version = await loop.run_in_executor(None, self._load)
+        old = self.snapshot
+        changed = old is None or version != old.version
+        if changed:
+            # Reuse the dashboard's precomputed views when they match this history
+            views = await loop.run_in_executor(
+                None, lambda: load_artifacts(version) if current_version() == version else None)
+            bodies = {}  # (path, query) → (json bytes, gzip bytes) for this version
+        else:
+            views, bodies = old.views, old.bodies
+        # Always serve what was just loaded; bodies are only reusable while the version holds
+        df = history.frame
+        self.snapshot = Snapshot(history, df, version, time.time(),
+                                 df["date_str"].max() if not df.empty else None,
+                                 views, bodies, self.fetch_detail)
+        return changed
+
+    async def refresh_forever(self):
+        while True:
+            await asyncio.sleep(self.refresh_secs)
+            try:
+                await self.refresh()
+            except Exception:
+                log.exception("refresh failed, serving version %s",
+                              self.snapshot.version if self.snapshot else None)
+
+
+# ─────────────────────────────────────────────
+# ROUTES — each takes a Snapshot and returns a JSON-serializable object or a JSON string
+# ─────────────────────────────────────────────
+def _int_param(query, name, default, lo, hi):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer")
+    return max(lo, min(hi, value))
+
+
+def route_version(snap, parts, query):
+    return {"version": snap.version, "loaded_at": snap.loaded_at,
+            "rows": int(len(snap.df)), "latest_date": snap.latest_date,
+            "detail_since": snap.history.cutoff}
+
+
+def route_latest(snap, parts, query):
+    groups = None
+    if "columns" in query:
+        groups = [g for g in query["columns"][0].split(",") if g]
+        if set(groups) - set(COLUMN_GROUPS):
+            raise HttpError(400, f"columns must be from {', '.join(COLUMN_GROUPS)}")
+    df = snap.history.recent
+    return display_frame(df[df["date_str"] == snap.latest_date], groups).to_json(orient="records")
+
+
+def route_history(snap, parts, query):
+    if len(parts) != 2:
+        raise HttpError(404, "use /history/<SYMBOL>")
+    symbol = unquote(parts[1]).upper()
+    days = _int_param(query, "days", 30, 1, 10_000)
+    df = snap.df
+    dates = df.loc[df["symbol"] == symbol, "date_str"]
+    if dates.empty:
+        raise HttpError(404, f"unknown symbol {symbol}")
+    # Past the recent tier this is one indexed Postgres read (off the event loop); cached per version
+    start = dates.sort_values().iloc[-days] if len(dates) >= days else dates.min()
+    hist = snap.history.detail(symbol, start, fetch=snap.fetch_detail)
+    return display_frame(hist).to_json(orient="records")
+
+
+def route_sectors(snap, parts, query):
+    date = query.get("date", [snap.latest_date])[0]
+    if snap.views is not None:
+        rollups = snap.views["sector_rollups"]
+        stats = rollups[rollups["date_str"] == date]
+    else:
+        stats = sector_rollups(snap.df[snap.df["date_str"] == date])
+    if stats.empty:
+        raise HttpError(404, f"no sector data for {date}")
+    return stats.sort_values("bull_pct", ascending=False).to_json(orient="records")
+
+
+def route_matrix(snap, parts, query):
+    days = _int_param(query, "days", 5, 1, MATRIX_MAX_DAYS)
+    dates = sorted(snap.df["date_str"].dropna().unique(), reverse=True)[:days]
+    if snap.views is not None:
+        pivots = snap.views["signal_pivots"]
+    else:
+        pivots = signal_pivots(snap.df, dates)
+    matrix = filter_signal_matrix(*pivots, dates)
+    rows = matrix.reset_index().to_json(orient="records")
+    return f'{{"dates": {json.dumps(sorted(dates))}, "rows": {rows}}}'
+
+
+ROUTES = {
+    "version": route_version,
+    "latest":  route_latest,
+    "history": route_history,
+    "sectors": route_sectors,
+    "matrix":  route_matrix,
+}
+
+
+# ─────────────────────────────────────────────
+# HTTP
+# ─────────────────────────────────────────────
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def _response(status, body=b"", headers=None, head=False):
+    """Status line, headers and body; `head` keeps the GET Content-Length but drops the body."""
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Length: {len(body)}"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + (b"" if head else body)
+
+
+def _error(status, message, head=False):
+    body = json.dumps({"error": message}).encode()
+    return _response(status, body, {"Content-Type": "application/json"}, head=head)
+
+
+async def dispatch(cache, method, target, headers):
+    """Bytes of the full HTTP response for one request."""
+    head = method == "HEAD"
+    if method not in ("GET", "HEAD"):
+        return _error(405, "read-only service")
+    snap = cache.snapshot  # one version for the whole request, even if refresh() swaps mid-way
+    if snap is None:
+        return _error(503, "data not loaded yet", head)
+    url = urlsplit(target)
+    parts = [p for p in url.path.split("/") if p]
+    handler = ROUTES.get(parts[0] if parts else "version")
+    if handler is None:
+        return _error(404, f"no route {url.path}", head)
+
+    # Resolve the body before honouring If-None-Match, so only real resources can 304
+    key = (url.path, url.query)
+    bodies = snap.bodies
+    if key not in bodies:
+        try:
+            # Off the event loop: /history can block on a Postgres read
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, handler, snap, parts, parse_qs(url.query))
+        except HttpError as e:
+            return _error(e.status, str(e), head)
+        except Exception as e:
+            log.exception("%s %s failed", method, target)
+            return _error(500, f"{type(e).__name__}: {e}", head)
+        raw = (result if isinstance(result, str) else json.dumps(result)).encode()
+        entry = (raw, gzip.compress(raw, compresslevel=5))
+        if len(bodies) >= MAX_BODY_CACHE:
+            bodies.clear()
+        bodies[key] = entry
+    else:
+        entry = bodies[key]
+
+    version = snap.version
+    etag = f'"{version}"'
+    common = {"ETag": etag, "X-Data-Version": version, "Cache-Control": "no-cache"}
+    if etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+        return _response(304, headers=common)
+    raw, zipped = entry
+    out = dict(common, **{"Content-Type": "application/json"})
+    body = raw
+    if "gzip" in headers.get("accept-encoding", ""):
+        body, out["Content-Encoding"] = zipped, "gzip"
+    return _response(200, body, out, head=head)
+
+
+async def handle_connection(cache, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                writer.write(_error(400, "malformed request line"))
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            writer.write(await dispatch(cache, method, target, headers))
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close" or version == "HTTP/1.0":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except (asyncio.LimitOverrunError, ValueError):
+        # A request or header line past the StreamReader limit
+        writer.write(_error(400, "request line or header too long"))
+    finally:
+        writer.close()
+
+
+async def serve(creds, host="127.0.0.1", port=8502, refresh_secs=REFRESH_SECS, recent_dates=RECENT_DATES):
+    cache = DataCache(creds, refresh_secs, recent_dates)
+    await cache.refresh()
+    server = await asyncio.start_server(lambda r, w: handle_connection(cache, r, w), host, port)
+    log.info("mpulse service on http://%s:%s · version %s · %d rows",
+             host, port, cache.snapshot.version, len(cache.snapshot.df))
+    async with server:
+        await asyncio.gather(server.serve_forever(), cache.refresh_forever())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read-only JSON API over mPulse execution results.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--secrets", default=SECRETS_PATH, help="secrets.toml with a [postgres] block")
+    parser.add_argument("--refresh", type=int, default=REFRESH_SECS, help="seconds between reloads")
+    parser.add_argument("--recent-dates", type=int, default=RECENT_DATES,
+                        help="tradedates kept with every column in memory (default: %(default)s)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(serve(load_credentials(args.secrets), args.host, args.port, args.refresh, args.recent_dates))
+
+
+if __name__ == "__main__":
+    main()
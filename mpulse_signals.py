@@ -0,0 +1,151 @@
+"""
+mPulseInsight — canonical signal vocabulary
+Signal / action parsing shared by the dashboard and the derived-view engines.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Ordinal levels, lowest → highest. A code is the index into its tuple, so a
+# positive code delta is an upgrade.
+SIGNAL_LEVELS = ("AVOID", "BEARISH", "NEUTRAL", "BULLISH", "HIGH CONVICTION BUY")
+SIG60_LEVELS  = ("AVOID", "EXHAUSTED", "NEUTRAL", "STRUCTURAL BUY")
+ACTION_LEVELS = ("EXIT", "WAIT", "LOCK", "ACCUMULATE", "ENTER")
+REGIME_LEVELS = ("RISK_ON", "NEUTRAL", "RISK_OFF", "CRASH")  # calm → stressed
+
+MISSING = -1  # matrix code for "no row for this symbol on this date"
+
+
+def clean_signal(s):
+    """Strip emojis/symbols to get canonical signal key."""
+    if not s:
+        return "NEUTRAL"
+    s = str(s).upper().strip()
+    s = s.replace("⚡ ", "").replace("🛡️ ", "").replace("⚡", "").replace("🛡️", "").strip()
+    return s
+
+def signal_key(s):
+    """Map a raw `signal` value onto SIGNAL_LEVELS (same precedence as signal_color)."""
+    cs = clean_signal(s)
+    for k in ("HIGH CONVICTION BUY", "BULLISH", "NEUTRAL", "BEARISH", "AVOID"):
+        if k in cs:
+            return k
+    return "NEUTRAL"
+
+def sig60_key(s):
+    """Map a raw `signal_60d` value onto SIG60_LEVELS."""
+    cs = clean_signal(s)
+    for k in ("STRUCTURAL BUY", "EXHAUSTED", "AVOID"):
+        if k in cs:
+            return k
+    return "NEUTRAL"
+
+def action_key(a):
+    """Map a raw `action` value onto ACTION_LEVELS (same precedence as action_badge)."""
+    a = str(a).upper() if a else ""
+    if "ENTER" in a:
+        return "ENTER"
+    elif "ACCUMULATE" in a:
+        return "ACCUMULATE"
+    elif "EXIT" in a or "AVOID" in a:
+        return "EXIT"
+    elif "LOCK" in a:
+        return "LOCK"
+    return "WAIT"
+
+def stance_key(s):
+    """Canonical `execution_stance` label (open vocabulary)."""
+    return str(s).upper().strip() if s else "TACTICAL"
+
+def regime_key(r):
+    """Map a raw `final_regime` value onto REGIME_LEVELS (unknown → NEUTRAL, like regime_meta)."""
+    r = str(r).upper().strip() if r else "NEUTRAL"
+    return r if r in REGIME_LEVELS else "NEUTRAL"
+
+def signal_class(s):
+    """Bullish / Bearish / Neutral bucket used by the sector breadth views."""
+    cs = clean_signal(s)
+    if "HIGH CONVICTION" in cs or "BULLISH" in cs:
+        return "Bullish"
+    elif "BEARISH" in cs:
+        return "Bearish"
+    else:
+        return "Neutral"
+
+def map_distinct(series, fn):
+    """Apply `fn` once per distinct value of `series` instead of once per row."""
+    uniq = series.dropna().unique()
+    out = series.map(dict(zip(uniq, (fn(u) for u in uniq))))
+    return out.where(series.notna(), fn(None))
+
+
+# field → (levels, parser). `execution_stance` has no fixed vocabulary, so its
+# levels are grown on demand by encode().
+CODED_FIELDS = {
+    "signal":           (SIGNAL_LEVELS, signal_key),
+    "signal_60d":       (SIG60_LEVELS,  sig60_key),
+    "action":           (ACTION_LEVELS, action_key),
+    "execution_stance": (None,          stance_key),
+}
+
+
+def encode(values, levels, parse):
+    """Vectorized value → int8 code. The parser runs once per distinct value, not per row.
+
+    `levels` may be a list, in which case unseen labels are appended to it.
+    Null values are parsed like any other value (clean_signal(None) → NEUTRAL).
+    """
+    cat = pd.Categorical(values)
+    lut = np.empty(len(cat.categories) + 1, dtype=np.int8)
+    for i, raw in enumerate(list(cat.categories) + [None]):
+        key = parse(raw)
+        if key not in levels:
+            levels.append(key)
+        lut[i] = levels.index(key)
+    # Categorical null code is -1, which picks the trailing parse(None) slot
+    return lut[cat.codes]
+
+
+def signal_code_matrix(df, field="signal", levels=None, symbols=None, dates=None):
+    """Pivot one coded field into a (symbol × tradedate) int8 matrix.
+
+    Dates are ascending `date_str` values. Returns (symbols, dates, matrix, levels);
+    cells with no row are MISSING.
+    """
+    fixed, parse = CODED_FIELDS[field]
+    if levels is None:
+        levels = list(fixed) if fixed is not None else []
+    if symbols is None:
+        symbols = np.sort(df["symbol"].dropna().unique())
+    if dates is None:
+        dates = np.sort(df["date_str"].dropna().unique())
+    sym_pos = pd.Index(symbols).get_indexer(df["symbol"])
+    date_pos = pd.Index(dates).get_indexer(df["date_str"])
+    keep = (sym_pos >= 0) & (date_pos >= 0)
+    matrix = np.full((len(symbols), len(dates)), MISSING, dtype=np.int8)
+    if field in df.columns:
+        codes = encode(df[field].to_numpy()[keep], levels, parse)
+        matrix[sym_pos[keep], date_pos[keep]] = codes
+    return symbols, dates, matrix, levels
+
+
+def date_digests(df, dates, columns):
+    """One uint64 content hash per tradedate over `columns` (those present), row order ignored.
+
+    Engines keep these next to their dates so a restated day is spotted and
+    recomputed rather than trusted because its date_str was already seen.
+    """
+    cols = ["symbol", "date_str"] + sorted(c for c in columns if c in df.columns and c not in ("symbol", "date_str"))
+    pos = pd.Index(dates).get_indexer(df["date_str"])
+    keep = pos >= 0
+    rows = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    digests = np.zeros(len(dates), dtype=np.uint64)
+    np.add.at(digests, pos[keep], rows[keep])  # wraps mod 2**64
+    return digests
+
+
+def unchanged_prefix(dates, digests, new_dates, new_digests):
+    """Number of leading tradedates whose date_str and digest both still match."""
+    n = min(len(dates), len(new_dates))
+    same = (np.asarray(dates[:n]) == np.asarray(new_dates[:n])) & (digests[:n] == new_digests[:n])
+    return n if same.all() else int(np.argmin(same))
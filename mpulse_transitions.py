@@ -0,0 +1,255 @@
+"""
+mPulseInsight — signal transition engine
+"What changed since yesterday": per-symbol signal / action / stance / rank
+moves between consecutive tradedates, computed on the signal-code matrix.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from mpulse_signals import CODED_FIELDS, MISSING, date_digests, signal_code_matrix, unchanged_prefix
+
+TRANSITION_FIELDS = ("signal", "signal_60d", "action", "execution_stance", "rank")
+ORDINAL_FIELDS    = ("signal", "signal_60d", "action")
+
+EVENT_COLUMNS = ["date_str", "symbol", "sector", "field", "from", "to", "kind", "delta"]
+DIGEST_COLUMNS = TRANSITION_FIELDS + ("sector",)
+
+
+def _empty_events():
+    return pd.DataFrame({c: pd.Series(dtype=("int64" if c == "delta" else object))
+                         for c in EVENT_COLUMNS})
+
+
+def _rank_matrix(df, symbols, dates):
+    sym_pos = pd.Index(symbols).get_indexer(df["symbol"])
+    date_pos = pd.Index(dates).get_indexer(df["date_str"])
+    keep = (sym_pos >= 0) & (date_pos >= 0)
+    matrix = np.full((len(symbols), len(dates)), np.nan)
+    if "rank" in df.columns:
+        matrix[sym_pos[keep], date_pos[keep]] = pd.to_numeric(df["rank"], errors="coerce").to_numpy()[keep]
+    return matrix
+
+
+def _diff_codes(field, matrix, levels, dates, symbols, rank_step, seen=None):
+    """Events between each pair of adjacent columns of `matrix`.
+
+    `dates` labels columns 1..n (column 0 is the prior state), so the whole
+    history or a single new day go through the same code path. `seen` flags
+    symbols observed before column 0; a symbol's first observation after
+    that is a NEW event (coded fields only).
+    """
+    prev, cur = matrix[:, :-1], matrix[:, 1:]
+    first = np.zeros(cur.shape, dtype=bool)
+    if field == "rank":
+        delta = prev - cur  # positive = moved up the book
+        with np.errstate(invalid="ignore"):
+            mask = np.abs(delta) >= rank_step
+    else:
+        delta = cur.astype(np.int16) - prev
+        mask = (prev != MISSING) & (cur != MISSING) & (delta != 0)
+        present = matrix != MISSING
+        if seen is not None:
+            present[:, 0] |= seen
+        first = (cur != MISSING) & ~np.logical_or.accumulate(present, axis=1)[:, :-1]
+        mask |= first
+    rows, cols = np.nonzero(mask)
+    if not len(rows):
+        return _empty_events()
+
+    d = delta[rows, cols]
+    if field == "rank":
+        frm = prev[rows, cols].astype(np.int64).astype(str)
+        to = cur[rows, cols].astype(np.int64).astype(str)
+    else:
+        labels = np.asarray(levels, dtype=object)
+        frm, to = labels[prev[rows, cols]], labels[cur[rows, cols]]
+    if field == "rank" or field in ORDINAL_FIELDS:
+        kind = np.where(d > 0, "UPGRADE", "DOWNGRADE").astype(object)
+    else:
+        kind = np.full(len(rows), "CHANGE", dtype=object)
+    new = first[rows, cols]
+    if new.any():
+        frm = np.where(new, None, frm)
+        kind[new] = "NEW"
+        d = np.where(new, 0, d)
+    return pd.DataFrame({
+        "date_str": np.asarray(dates, dtype=object)[cols],
+        "symbol":   np.asarray(symbols, dtype=object)[rows],
+        "sector":   None,
+        "field":    field,
+        "from":     frm,
+        "to":       to,
+        "kind":     kind,
+        "delta":    d.astype(np.int64),
+    })
+
+
+class TransitionEngine:
+    """Transition events over the full history, extended one tradedate at a time.
+
+    Keeps the (symbol × date) code matrix per field so that a new tradedate is
+    diffed against the last column only, and transition counts can be read
+    straight off the matrix.
+    """
+
+    def __init__(self, rank_step=5):
+        self.rank_step = rank_step
+        self._lock = threading.Lock()
+        self._reset()
+
+    def __getstate__(self):
+        # Engines are pickled into the precompute artifact store; locks aren't picklable
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self.symbols = np.array([], dtype=object)
+        self.dates = np.array([], dtype=object)
+        self.digests = np.array([], dtype=np.uint64)  # per-date content hash, aligned with dates
+        self.source = None  # (data_version, rows) of the frame last folded in
+        self.matrices = {}
+        self.levels = {f: (list(lv) if lv is not None else []) for f, (lv, _) in CODED_FIELDS.items()}
+        self.sectors = pd.Series(dtype=object)
+        self.events = _empty_events()
+
+    # ── build / update ──
+    def update(self, df):
+        """Bring the engine up to date with `df`; returns the number of dates (re)processed.
+
+        Dates whose rows were restated since the last update are recomputed
+        from the first changed date onwards.
+        """
+        if df.empty or "date_str" not in df.columns:
+            return 0
+        with self._lock:
+            source = (df.attrs.get("data_version"), len(df))
+            if source[0] is not None and source == self.source:
+                return 0
+            df_dates = np.sort(df["date_str"].dropna().unique())
+            digests = date_digests(df, df_dates, DIGEST_COLUMNS)
+            known = unchanged_prefix(self.dates, self.digests, df_dates, digests)
+            if known:
+                self._truncate(known)
+                new_dates = df_dates[known:]
+                if len(new_dates):
+                    self._extend(df[df["date_str"].isin(new_dates)], new_dates)
+            else:
+                new_dates = df_dates
+                self._build(df, df_dates)
+            self.digests, self.source = digests, source
+            return len(new_dates)
+
+    def _build(self, df, dates):
+        self._reset()
+        self.symbols = np.sort(df["symbol"].dropna().unique()).astype(object)
+        self.dates = dates
+        self._set_sectors(df)
+        frames = []
+        for field in TRANSITION_FIELDS:
+            if field == "rank":
+                matrix = _rank_matrix(df, self.symbols, dates)
+            else:
+                _, _, matrix, self.levels[field] = signal_code_matrix(
+                    df, field, self.levels[field], self.symbols, dates)
+            self.matrices[field] = matrix
+            frames.append(_diff_codes(field, matrix, self.levels.get(field), dates[1:],
+                                      self.symbols, self.rank_step))
+        self.events = self._finish(frames)
+
+    def _truncate(self, n):
+        """Drop every date from position `n` on (and the events dated on them)."""
+        if n == len(self.dates):
+            return
+        self.dates = self.dates[:n]
+        self.matrices = {f: m[:, :n] for f, m in self.matrices.items()}
+        self.events = self.events[self.events["date_str"] <= self.dates[-1]].reset_index(drop=True)
+
+    def _extend(self, new_df, new_dates):
+        new_syms = np.setdiff1d(new_df["symbol"].dropna().unique().astype(object), self.symbols)
+        if len(new_syms):
+            self.symbols = np.concatenate([self.symbols, new_syms])
+            for field, matrix in self.matrices.items():
+                pad = np.full((len(new_syms), matrix.shape[1]),
+                              np.nan if field == "rank" else MISSING, dtype=matrix.dtype)
+                self.matrices[field] = np.vstack([matrix, pad])
+        self._set_sectors(new_df)
+        frames = []
+        for field in TRANSITION_FIELDS:
+            if field == "rank":
+                cols = _rank_matrix(new_df, self.symbols, new_dates)
+            else:
+                _, _, cols, self.levels[field] = signal_code_matrix(
+                    new_df, field, self.levels[field], self.symbols, new_dates)
+            matrix = np.hstack([self.matrices[field], cols])
+            self.matrices[field] = matrix
+            window = matrix[:, -(len(new_dates) + 1):]
+            seen = (matrix[:, :-(len(new_dates) + 1)] != MISSING).any(axis=1)
+            frames.append(_diff_codes(field, window, self.levels.get(field), new_dates,
+                                      self.symbols, self.rank_step, seen))
+        self.dates = np.concatenate([self.dates, new_dates])
+        # New dates sort ahead of everything already in the feed
+        self.events = pd.concat([self._finish(frames), self.events], ignore_index=True)
+
+    def _set_sectors(self, df):
+        if "sector" not in df.columns:
+            return
+        latest = df.sort_values("date_str").drop_duplicates("symbol", keep="last")
+        latest = latest.set_index("symbol")["sector"]
+        self.sectors = latest if self.sectors.empty else pd.concat([self.sectors, latest])
+        self.sectors = self.sectors[~self.sectors.index.duplicated(keep="last")]
+
+    def _finish(self, frames):
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return _empty_events()
+        events = pd.concat(frames, ignore_index=True)
+        events["sector"] = events["symbol"].map(self.sectors)
+        return events.sort_values(["date_str", "field", "symbol"], ascending=[False, True, True],
+                                  ignore_index=True)
+
+    # ── queries ──
+    def feed(self, since=None, fields=None, kinds=None, to_values=None, search=""):
+        """Filterable change feed, newest first. `since` is an exclusive date_str bound."""
+        ev = self.events
+        mask = np.ones(len(ev), dtype=bool)
+        if since is not None:
+            mask &= (ev["date_str"] > since).to_numpy()
+        if fields:
+            mask &= ev["field"].isin(fields).to_numpy()
+        if kinds:
+            mask &= ev["kind"].isin(kinds).to_numpy()
+        if to_values:
+            mask &= ev["to"].isin(to_values).to_numpy()
+        if search:
+            mask &= (ev["symbol"].fillna("").astype(str).str.contains(search, na=False) |
+                     ev["sector"].fillna("").astype(str).str.contains(search, case=False, na=False)).to_numpy()
+        return ev[mask]
+
+    def transition_counts(self, field, since=None):
+        """(from × to) transition counts over adjacent dates after `since`, unchanged rows included.
+
+        Only coded fields have levels to count over; anything else (e.g. rank) raises ValueError.
+        """
+        if field not in self.levels:
+            raise ValueError(f"transition_counts: {field!r} is not a coded field ({', '.join(self.levels)})")
+        levels = self.levels[field]
+        k = len(levels)
+        matrix = self.matrices.get(field)
+        if matrix is None or matrix.shape[1] < 2:
+            return pd.DataFrame(0, index=levels, columns=levels)
+        start = 0 if since is None else max(int(np.searchsorted(self.dates, since, side="right")) - 1, 0)
+        window = matrix[:, start:]
+        prev, cur = window[:, :-1].ravel(), window[:, 1:].ravel()
+        ok = (prev != MISSING) & (cur != MISSING)
+        counts = np.bincount(prev[ok].astype(np.int64) * k + cur[ok], minlength=k * k)
+        out = pd.DataFrame(counts.reshape(k, k), index=levels, columns=levels)
+        out.index.name, out.columns.name = "from", "to"
+        return out
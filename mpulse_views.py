@@ -0,0 +1,126 @@
+"""
+mPulseInsight — derived views
+Sector rollups, signal-matrix pivots and factor analytics built from the
+execution-results history. Pure pandas, no Streamlit, so they can run in
+worker processes as well as in the dashboard.
+"""
+
+import hashlib
+
+import pandas as pd
+
+from mpulse_data import normalized_factors
+from mpulse_signals import clean_signal, map_distinct, signal_class
+
+MATRIX_MAX_DAYS = 60  # upper bound of the sidebar lookback slider
+
+
+def data_version(*frames):
+    """Short content hash over every column (names and values) of one loaded history.
+
+    Pass several frames when a history is held in parts (e.g. a TieredHistory's
+    `frame` and `wide`); any restated value in any of them changes the version.
+    """
+    if all(df.empty for df in frames):
+        return "empty"
+    digest = hashlib.sha1()
+    for df in frames:
+        cols = sorted(df.columns)
+        digest.update("\x1f".join(map(str, cols)).encode())
+        if len(df):
+            digest.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+# ─────────────────────────────────────────────
+# SECTOR ROLLUPS
+# ─────────────────────────────────────────────
+def sector_rollups(df):
+    """Per (date_str, sector) breadth stats, sorted by Bull% within each date."""
+    if "sector" not in df.columns:
+        return pd.DataFrame()
+    # Same grouping as SECTOR_ROLLUP_QUERY's COALESCE(sector, 'Unknown')
+    work = df[["date_str", "symbol", "s_hybrid"]].assign(
+        sector=df["sector"].fillna("Unknown"),
+        final_dollars=df["final_dollars"] if "final_dollars" in df.columns else 0.0)
+    sig_class = map_distinct(df["signal"], signal_class)
+    work["bull"] = (sig_class == "Bullish").astype(int)
+    work["bear"] = (sig_class == "Bearish").astype(int)
+    stats = work.groupby(["date_str", "sector"]).agg(
+        total         = ("symbol", "count"),
+        bullish       = ("bull", "sum"),
+        bearish       = ("bear", "sum"),
+        avg_hybrid    = ("s_hybrid", "mean"),
+        total_dollars = ("final_dollars", "sum"),
+    ).reset_index()
+    return with_breadth(stats)
+
+
+def with_breadth(stats):
+    """Add bull_pct / breadth to per-(date, sector) counts (pandas- or SQL-built)."""
+    stats = stats.copy()
+    stats["bull_pct"] = (stats["bullish"] / stats["total"] * 100).round(1)
+    stats["breadth"]  = (stats["bullish"] / stats["total"]).round(3)
+    return stats.sort_values(["date_str", "bull_pct"], ascending=[True, False], ignore_index=True)
+
+
+# ─────────────────────────────────────────────
+# SIGNAL MATRIX
+# ─────────────────────────────────────────────
+def signal_pivots(df, dates):
+    """Signal and s_hybrid pivots over `dates` plus the latest-date rank per symbol.
+
+    Any lookback up to len(dates) is a column slice of these, so one build
+    serves every position of the lookback slider.
+    """
+    sub = df[df["date_str"].isin(dates)]
+    index = ["symbol", "sector"] if "sector" in sub.columns else ["symbol"]
+    signals = sub.pivot_table(index=index, columns="date_str", values="signal", aggfunc="first")
+    hybrid = sub.pivot_table(index=index, columns="date_str", values="s_hybrid", aggfunc="first") \
+        .reindex(index=signals.index, columns=signals.columns)
+    latest = sub[sub["date_str"] == max(dates)] if len(dates) else sub.iloc[:0]
+    ranks = latest[["symbol", "rank", "s_hybrid"]].drop_duplicates("symbol").set_index("symbol")
+    return signals, hybrid, ranks
+
+
+def filter_signal_matrix(signals, hybrid, ranks, dates, search="", sig_filter=None, min_score=0.0):
+    """Apply the sidebar filters to prebuilt pivots; returns the display frame indexed by symbol."""
+    cols = [d for d in sorted(dates) if d in signals.columns]
+    sig, hyb = signals[cols], hybrid[cols]
+    keep = sig.notna().any(axis=1)
+    if search:
+        symbols = sig.index.get_level_values("symbol").to_series(index=sig.index)
+        hit = symbols.str.contains(search, na=False)
+        if "sector" in sig.index.names:
+            sectors = sig.index.get_level_values("sector").to_series(index=sig.index)
+            hit |= sectors.str.contains(search, case=False, na=False)
+        keep &= hit
+    if sig_filter:
+        # Keep tickers that had ANY matching signal in the window
+        values = pd.unique(sig[keep].to_numpy().ravel())
+        wanted = [v for v in values if pd.notna(v) and any(f in clean_signal(v) for f in sig_filter)]
+        keep &= sig.isin(wanted).any(axis=1)
+    sig, hyb = sig[keep], hyb[keep]
+    if min_score > 0:
+        sig = sig.where(hyb >= min_score)
+        sig = sig[sig.notna().any(axis=1)]
+        sig = sig.loc[:, sig.notna().any(axis=0)]
+    out = sig.reset_index()
+    out = out.merge(ranks[["rank"]], left_on="symbol", right_index=True, how="left") \
+        .sort_values("rank", na_position="last").drop(columns="rank")
+    out.columns.name = None
+    return out.set_index("symbol")
+
+
+# ─────────────────────────────────────────────
+# FACTOR ANALYTICS
+# ─────────────────────────────────────────────
+def factor_trends(df):
+    """Cross-sectional mean and dispersion of each normalized factor per date."""
+    factors = normalized_factors(df)
+    if factors.empty:
+        return pd.DataFrame()
+    factors["date_str"] = df["date_str"]
+    stats = factors.groupby("date_str").agg(["mean", "std"])
+    stats.columns = [f"{f}_{stat}" for f, stat in stats.columns]
+    return stats
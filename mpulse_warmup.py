@@ -0,0 +1,117 @@
+"""
+mPulseInsight — cache warm-up
+Runs the dashboard headlessly once with the default sidebar settings, so the
+process's st.cache_data / st.cache_resource entries (snapshot, history,
+sector trend, engines, figures) and the shared precompute artifacts are all
+built before the first user arrives; then serves the dashboard from the same
+process. Streamlit only binds its port (and /_stcore/health only answers)
+once warm-up is done, so the load balancer's readiness check is the gate.
+
+Credentials come from Streamlit's own secrets lookup (.streamlit/secrets.toml,
+or `secrets.files` in .streamlit/config.toml), the same source the server
+reads. Set secrets.files in config.toml rather than as a flag after `--`,
+which only the server would see.
+
+What stays warm: the st.cache_resource entries (engines, figure cache, router,
+alert engine) and the artifact store last until the process exits. The
+st.cache_data loaders (snapshot, history, sector trend) keep Streamlit's
+ttl=120s, so the first rerun after that refetches them from Postgres, one
+query each, and rebuilds nothing else unless the data changed.
+
+    python mpulse_warmup.py                           warm up, then serve
+    python mpulse_warmup.py -- --server.port 8501     `streamlit run` flags go after --
+    python mpulse_warmup.py --no-serve                warm the artifact store and exit (0 = ready)
+    python mpulse_warmup.py --ready-file /tmp/mpulse.ready   marker for exec-style readiness probes
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+from mpulse_precompute import ARTIFACT_DIR, current_version, wait_idle
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mpulse_insight.py")
+READY_FILE = os.environ.get("MPULSE_READY_FILE")
+
+
+def _run(at):
+    t0 = time.perf_counter()
+    at.run()
+    secs = time.perf_counter() - t0
+    problems = [str(e.value) for e in at.exception] + [str(w.value) for w in at.warning
+                                                       if "No data available" in str(w.value)]
+    if problems:
+        raise RuntimeError(f"warm-up run failed: {problems[0]}")
+    return secs
+
+
+def warm(timeout=600, out=sys.stdout):
+    """Render the default view, wait for its precompute to publish, then render it again.
+
+    The second run takes the artifact path and warms what depends on it.
+    Returns a summary dict; raises RuntimeError if the dashboard errors or
+    the secrets have no [postgres] block.
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # pandas warns on every read_sql through a plain DB-API connection
+    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+    # Leave at.secrets empty: the app then reads st.secrets, exactly as the server will
+    if "postgres" not in st.secrets:
+        raise RuntimeError("no [postgres] block in the Streamlit secrets")
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    t0 = time.perf_counter()
+    cold = _run(at)
+    print(f"cold render      {cold:.2f}s", file=out)
+    published = wait_idle(timeout)
+    print(f"precompute       {'published ' + (current_version() or '—') if published else 'timed out'}"
+          f" ({time.perf_counter() - t0 - cold:.2f}s)", file=out)
+    warm_secs = _run(at)
+    print(f"warm render      {warm_secs:.2f}s", file=out)
+    return {"ready_at": time.time(), "cold_secs": cold, "warm_secs": warm_secs,
+            "total_secs": time.perf_counter() - t0, "artifact_version": current_version(),
+            "artifacts_published": published, "artifact_dir": ARTIFACT_DIR}
+
+
+def _write_ready(path, summary):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm the mPulse dashboard caches, then serve it.")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per render / precompute")
+    parser.add_argument("--ready-file", default=READY_FILE, help="write a JSON marker here once warm")
+    parser.add_argument("--no-serve", dest="serve", action="store_false",
+                        help="exit after warming instead of starting the server")
+    parser.add_argument("streamlit_args", nargs=argparse.REMAINDER, help="-- then `streamlit run` flags")
+    args = parser.parse_args(argv)
+
+    if args.ready_file and os.path.exists(args.ready_file):
+        os.remove(args.ready_file)
+    try:
+        summary = warm(args.timeout)
+    except Exception as e:
+        print(f"NOT READY  {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.ready_file:
+        _write_ready(args.ready_file, summary)
+    print(f"ready in {summary['total_secs']:.2f}s", flush=True)
+
+    if args.serve:
+        from streamlit.web import cli as stcli
+
+        flags = [a for a in args.streamlit_args if a != "--"]
+        sys.argv = ["streamlit", "run", APP_PATH, *flags]
+        sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from mpulse_data import normalize
+from mpulse_loadtest import synthetic_history
+
+
+@pytest.fixture
+def history():
+    """Small normalized execution history, newest tradedate first."""
+    return normalize(synthetic_history(n_symbols=40, n_days=30, seed=7))
+
+
+def restate(df, date_str, column, value):
+    """Copy of `df` with `column` overwritten on one date (a vendor restatement)."""
+    out = df.copy()
+    out.loc[out["date_str"] == date_str, column] = value
+    return out
+
+
+def dates_of(df):
+    return sorted(pd.unique(df["date_str"]))
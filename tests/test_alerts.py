@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mpulse_alerts import AlertEngine, OutboxSink, load_rules, update_rules
+
+
+def day(date, **columns):
+    symbols = columns.pop("symbol", ["AAA", "BBB"])
+    return pd.DataFrame({"date_str": date, "symbol": symbols, "sector": "Technology", **columns})
+
+
+class ListSink:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, alerts):
+        self.sent += alerts
+
+
+def run(engine, *days):
+    """Feed a growing history one tradedate at a time; returns every alert fired."""
+    fired, history = [], []
+    for d in days:
+        history.append(d)
+        fired += engine.update(pd.concat(history, ignore_index=True))
+    return fired
+
+
+def test_threshold_fires_on_the_crossing_only():
+    engine = AlertEngine([{"id": "pen", "field": "sector_penalty", "below": 1.0}])
+    fired = run(engine,
+                day("2025-01-02", sector_penalty=[1.0, 1.0]),
+                day("2025-01-03", sector_penalty=[0.5, 1.0]),
+                day("2025-01-06", sector_penalty=[0.5, 1.0]),
+                day("2025-01-07", sector_penalty=[1.0, 1.0]),
+                day("2025-01-08", sector_penalty=[0.4, 1.0]))
+    assert [(a["date"], a["symbol"]) for a in fired] == [("2025-01-03", "AAA"), ("2025-01-08", "AAA")]
+
+
+def test_categorical_rule_fires_on_change_into_target():
+    engine = AlertEngine([{"id": "enter", "symbols": ["BBB"], "field": "action", "to": "ENTER"}])
+    fired = run(engine,
+                day("2025-01-02", action=["WAIT", "WAIT"]),
+                day("2025-01-03", action=["ENTER", "ENTER"]),
+                day("2025-01-06", action=["ENTER", "ENTER"]))
+    assert [(a["symbol"], a["from"], a["to"]) for a in fired] == [("BBB", "WAIT", "ENTER")]
+
+
+def test_unchanged_watermark_rows_are_skipped():
+    engine = AlertEngine([{"id": "pen", "field": "sector_penalty", "below": 1.0}])
+    first, second = day("2025-01-02", sector_penalty=[1.0, 1.0]), day("2025-01-03", sector_penalty=[0.5, 1.0])
+    run(engine, first, second)
+    assert engine.update(pd.concat([first, second])) == []
+    assert engine.last_eval["rows"] == 0
+
+
+def test_missing_value_replaces_the_previous_one():
+    engine = AlertEngine([{"id": "pen", "field": "sector_penalty", "below": 1.0}])
+    fired = run(engine,
+                day("2025-01-02", sector_penalty=[0.5, 1.0]),
+                day("2025-01-03", sector_penalty=[np.nan, 1.0]))
+    assert fired == []
+    assert np.isnan(engine.state.at["AAA", "sector_penalty"])
+
+
+def test_outbox_delivers_each_alert_once_across_engines(tmp_path):
+    rules = [{"id": "pen", "field": "sector_penalty", "below": 1.0}]
+    days = (day("2025-01-02", sector_penalty=[1.0, 1.0]), day("2025-01-03", sector_penalty=[0.5, 0.5]))
+    webhooks = []
+    for _ in range(3):
+        webhooks.append(ListSink())
+        engine = AlertEngine(rules, sinks=[webhooks[-1], OutboxSink(str(tmp_path / "outbox.ndjson"))])
+        assert len(run(engine, *days)) == 2
+    assert [len(w.sent) for w in webhooks] == [2, 0, 0]
+    assert len((tmp_path / "outbox.ndjson").read_text().splitlines()) == 2
+
+
+def test_update_rules_validates_before_writing(tmp_path):
+    path = str(tmp_path / "rules.json")
+    update_rules(lambda rules: rules + [{"id": "a", "field": "action", "to": "ENTER"}], path)
+    with pytest.raises(ValueError):
+        update_rules(lambda rules: rules + [{"id": "a", "field": "action", "to": "EXIT"}], path)
+    assert [r["id"] for r in load_rules(path)] == ["a"]
@@ -0,0 +1,64 @@
+import io
+
+import pandas as pd
+import pytest
+
+from mpulse_export import CsvWriter, ParquetWriter, build_query, changed_rows, main
+
+
+def chunks():
+    first = pd.DataFrame({"date_str": ["2025-01-02"] * 2, "symbol": ["AAA", "BBB"],
+                          "notes": [None, None], "final_weight": [0.01, float("nan")]})
+    second = pd.DataFrame({"date_str": ["2025-01-03"], "symbol": ["CCC"],
+                           "notes": ["restated"], "final_weight": [0.02]})
+    return first, second
+
+
+def test_csv_writer_writes_one_header(tmp_path):
+    path = tmp_path / "out.csv"
+    writer = CsvWriter(str(path))
+    for chunk in chunks():
+        writer.write(chunk)
+    writer.close()
+    out = pd.read_csv(path)
+    assert list(out["symbol"]) == ["AAA", "BBB", "CCC"]
+    assert path.read_text().count("date_str") == 1
+
+
+def test_parquet_writer_types_all_null_first_chunk_as_string(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "out.parquet"
+    writer = ParquetWriter(str(path))
+    for chunk in chunks():
+        writer.write(chunk)
+    writer.close()
+    table = pq.read_table(path)
+    assert str(table.schema.field("notes").type) == "string"
+    assert table.column("notes").to_pylist() == [None, None, "restated"]
+
+
+def test_changes_window_is_bounded_by_the_selection():
+    sql, params = build_query(start="2025-01-01", end="2025-02-01", changes=True)
+    inner = sql.split(" WINDOW ")[0]
+    assert "tradedate <= %(end)s" in inner
+    assert "WHERE tradedate < %(start)s" in inner  # one tradedate of baseline before the range
+    assert params == {"start": "2025-01-01", "end": "2025-02-01"}
+
+
+def test_changed_rows_keeps_new_and_changed_symbols():
+    chunk = pd.DataFrame({"symbol": ["AAA", "BBB", "CCC"],
+                          "prev_tradedate": ["2025-01-02", "2025-01-02", None],
+                          "action": ["ENTER", "WAIT", "WAIT"], "prev_action": ["WAIT", "WAIT", None]})
+    assert list(changed_rows(chunk)["symbol"]) == ["AAA", "CCC"]
+
+
+@pytest.mark.parametrize("argv", [
+    ["--since", "2025-01-01"],
+    ["--changes", "--since", "2025-01-01", "--start", "2025-01-01"],
+    ["--date", "2025-01-02", "--end", "2025-01-31"],
+])
+def test_main_rejects_conflicting_selections(argv, monkeypatch):
+    monkeypatch.setattr("sys.stderr", io.StringIO())
+    with pytest.raises(SystemExit) as exc:
+        main(argv)
+    assert exc.value.code == 2
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from conftest import dates_of, restate
+from mpulse_portfolio import AllocationAnalytics
+
+
+def built(df):
+    engine = AllocationAnalytics()
+    engine.update(df)
+    return engine
+
+
+def assert_same(a, b):
+    pd.testing.assert_frame_equal(a.daily, b.daily, check_dtype=False)
+    pd.testing.assert_frame_equal(a.sector_exposure, b.sector_exposure[a.sector_exposure.columns],
+                                  check_dtype=False)
+
+
+def test_incremental_update_matches_full_build(history):
+    dates = dates_of(history)
+    engine = built(history[history["date_str"] <= dates[-4]])
+    assert engine.update(history) == 3
+    assert_same(engine, built(history))
+
+
+def test_restatement_recomputes_from_changed_date(history):
+    dates = dates_of(history)
+    engine = built(history)
+    restated = restate(history, dates[12], "final_weight", 0.05)
+    assert engine.update(restated) == len(dates) - 12
+    assert_same(engine, built(restated))
+    assert engine.update(restated) == 0
@@ -0,0 +1,57 @@
+import os
+import threading
+
+import pytest
+
+import mpulse_precompute as pc
+
+
+def publish(root, version):
+    vdir = root / version
+    vdir.mkdir()
+    pc._dump({"rows": version}, vdir / "sector_rollups.pkl")
+    (vdir / pc.MANIFEST).write_text('{"version": "%s"}' % version)
+    (root / pc.CURRENT).write_text(version)
+
+
+@pytest.fixture
+def store(tmp_path):
+    root = tmp_path / "artifacts"
+    root.mkdir(mode=0o700)
+    for i, version in enumerate(("v1", "v2", "v3")):
+        publish(root, version)
+        os.utime(root / version, (i, i))
+    return root
+
+
+def test_load_artifacts_reads_a_published_version(store):
+    views = pc.load_artifacts("v3", str(store))
+    assert views["sector_rollups"] == {"rows": "v3"}
+    assert views["manifest"]["version"] == "v3"
+    assert pc.load_artifacts("missing", str(store)) is None
+
+
+def test_prune_keeps_current_and_newest(store):
+    pc._prune(str(store), keep=2)
+    assert sorted(os.listdir(store)) == [pc.CURRENT, "v2", "v3"]
+    assert pc.load_artifacts("v1", str(store)) is None
+
+
+@pytest.mark.skipif(pc.fcntl is None, reason="no flock on this platform")
+def test_prune_skips_a_version_being_read(store):
+    reading, release = threading.Event(), threading.Event()
+
+    def reader():
+        with pc._reading(str(store / "v1")):
+            reading.set()
+            release.wait(5)
+
+    t = threading.Thread(target=reader)
+    t.start()
+    reading.wait(5)
+    pc._prune(str(store), keep=1)
+    release.set()
+    t.join()
+    assert sorted(os.listdir(store)) == [pc.CURRENT, "v1", "v3"]
+    pc._prune(str(store), keep=1)
+    assert sorted(os.listdir(store)) == [pc.CURRENT, "v3"]
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from conftest import dates_of, restate
+from mpulse_regimes import RegimeStatistics
+
+
+def built(df):
+    engine = RegimeStatistics()
+    engine.update(df)
+    return engine
+
+
+def assert_same(a, b):
+    pd.testing.assert_frame_equal(a.table(), b.table())
+    np.testing.assert_array_equal(a.run_hist, b.run_hist)
+    np.testing.assert_array_equal(a.regime_days(), b.regime_days())
+
+
+def test_incremental_update_matches_full_build(history):
+    dates = dates_of(history)
+    engine = built(history[history["date_str"] <= dates[-4]])
+    assert engine.update(history) == 3
+    assert_same(engine, built(history))
+
+
+def test_restatement_recomputes(history):
+    dates = dates_of(history)
+    engine = built(history)
+    restated = restate(history, dates[8], "s_hybrid", 0.5)
+    assert engine.update(restated) > 0
+    assert_same(engine, built(restated))
+    assert engine.update(restated) == 0
+
+
+def test_regime_days_cover_every_date(history):
+    engine = built(history)
+    assert engine.table()["observations"].sum() > 0
+    assert engine.regime_days().sum() == len(dates_of(history))
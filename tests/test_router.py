@@ -0,0 +1,104 @@
+import pandas as pd
+import psycopg2
+import pytest
+
+import mpulse_data
+from mpulse_data import ReadRouter
+
+PRIMARY, R1, R2 = "db:5432", "r1:5432", "r2:5432"
+CREDS = {"host": "db", "port": 5432, "database": "mpulse", "user": "u", "password": "",
+         "replicas": [{"host": "r1"}, {"host": "r2"}]}
+
+
+class Endpoints:
+    """Stands in for mpulse_data.connect: per-endpoint latest tradedate, or down."""
+
+    def __init__(self):
+        self.latest = {PRIMARY: "2025-01-10", R1: "2025-01-10", R2: "2025-01-10"}
+        self.down = set()
+        self.attempts = []
+
+    def connect(self, creds):
+        name = mpulse_data.endpoint_name(creds)
+        self.attempts.append(name)
+        if name in self.down:
+            raise psycopg2.OperationalError(f"could not connect to server {name}")
+        return Connection(pd.Timestamp(self.latest[name]))
+
+
+class Connection:
+    def __init__(self, latest):
+        self.latest = latest
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        assert sql == mpulse_data.LAG_QUERY
+
+    def fetchone(self):
+        return (self.latest,)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    endpoints = Endpoints()
+    monkeypatch.setattr(mpulse_data, "connect", endpoints.connect)
+    return endpoints
+
+
+def test_current_replica_is_preferred(endpoints):
+    _, name = ReadRouter(CREDS).connect()
+    assert name == R1
+
+
+def test_down_replica_fails_over_and_backs_off(endpoints):
+    router = ReadRouter(CREDS)
+    endpoints.down.add(R1)
+    assert router.connect()[1] == R2
+    assert router.status()[R1]["failures"] == 1
+    endpoints.attempts.clear()
+    assert router.connect()[1] == R2
+    assert R1 not in endpoints.attempts  # still backed off
+
+
+def test_lagging_replica_is_skipped(endpoints):
+    endpoints.latest[R1] = "2025-01-07"
+    router = ReadRouter(CREDS)
+    assert router.connect()[1] == R2
+    assert router.status()[R1]["lagging"]
+
+
+def test_stale_replica_still_serves_when_nothing_else_answers(endpoints):
+    endpoints.latest[R1] = "2025-01-07"
+    router = ReadRouter(CREDS)
+    router.connect()
+    endpoints.down |= {R2, PRIMARY}
+    assert router.connect()[1] == R1
+
+
+def test_primary_probe_failure_does_not_mark_the_replica(endpoints):
+    endpoints.down.add(PRIMARY)
+    router = ReadRouter(CREDS)
+    assert router.connect()[1] == R1
+    status = router.status()
+    assert status[PRIMARY]["failures"] == 1
+    assert status[R1]["failures"] == 0 and not status[R1]["lagging"]
+
+
+def test_everything_down_raises(endpoints):
+    endpoints.down |= {PRIMARY, R1, R2}
+    with pytest.raises(psycopg2.OperationalError):
+        ReadRouter(CREDS).connect()
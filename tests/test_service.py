@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+import mpulse_service as service
+from mpulse_data import TieredHistory
+
+
+class StaticCache(service.DataCache):
+    """DataCache over an in-memory history instead of Postgres."""
+
+    def __init__(self, frames):
+        super().__init__(creds=None)
+        self.frames = list(frames)
+
+    def _load(self):
+        history = TieredHistory(self.frames[0], self.frames[0].iloc[:0])
+        if len(self.frames) > 1:
+            self.frames.pop(0)
+        return history, service.data_version(history.frame, history.wide)
+
+
+@pytest.fixture
+def cache(history, monkeypatch):
+    monkeypatch.setattr(service, "current_version", lambda: None)
+    cache = StaticCache([history])
+    asyncio.run(cache.refresh())
+    return cache
+
+
+def request(cache, target, method="GET", **headers):
+    raw = asyncio.run(service.dispatch(cache, method, target, headers))
+    head, _, body = raw.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    fields = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), fields, body
+
+
+def test_etag_round_trip_returns_304(cache):
+    status, headers, body = request(cache, "/version")
+    assert status == 200
+    assert headers["ETag"] == f'"{cache.snapshot.version}"'
+    assert json.loads(body)["version"] == cache.snapshot.version
+
+    status, headers, body = request(cache, "/version", **{"if-none-match": headers["ETag"]})
+    assert status == 304 and body == b""
+    assert request(cache, "/version", **{"if-none-match": '"stale"'})[0] == 200
+
+
+def test_unknown_resources_never_304(cache):
+    etag = f'"{cache.snapshot.version}"'
+    assert request(cache, "/nope", **{"if-none-match": etag})[0] == 404
+    assert request(cache, "/history/NOPE", **{"if-none-match": etag})[0] == 404
+
+
+def test_head_keeps_length_but_sends_no_body(cache):
+    _, get_headers, get_body = request(cache, "/matrix?days=3")
+    status, headers, body = request(cache, "/matrix?days=3", method="HEAD")
+    assert status == 200 and body == b""
+    assert headers["Content-Length"] == get_headers["Content-Length"] == str(len(get_body))
+    status, headers, body = request(cache, "/nope", method="HEAD")
+    assert status == 404 and body == b"" and int(headers["Content-Length"]) > 0
+
+
+def test_matrix_body_is_json(cache):
+    _, _, body = request(cache, "/matrix?days=3")
+    out = json.loads(body)
+    assert len(out["dates"]) == 3 and out["rows"]
+
+
+def test_requests_see_one_snapshot_across_a_refresh(history, monkeypatch):
+    monkeypatch.setattr(service, "current_version", lambda: None)
+    restated = history.assign(vix=history["vix"] + 1)
+    cache = StaticCache([history, restated])
+    asyncio.run(cache.refresh())
+    first = cache.snapshot
+
+    def route(snap, parts, query):
+        asyncio.run(cache.refresh())  # a refresh lands while the handler runs
+        return {"version": snap.version}
+
+    monkeypatch.setitem(service.ROUTES, "version", route)
+    status, headers, body = request(cache, "/version")
+    assert cache.snapshot.version != first.version
+    assert headers["ETag"] == f'"{first.version}"' == f'"{json.loads(body)["version"]}"'
+    assert ("/version", "") not in cache.snapshot.bodies
+
+
+def test_oversized_header_gets_400(cache):
+    async def send(payload):
+        server = await asyncio.start_server(lambda r, w: service.handle_connection(cache, r, w),
+                                            "127.0.0.1", 0, limit=1024)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(payload)
+            await writer.drain()
+            reply = await reader.read()
+            writer.close()
+            return reply
+
+    reply = asyncio.run(send(b"GET /version HTTP/1.1\r\nX-Big: " + b"a" * 4096 + b"\r\n\r\n"))
+    assert reply.startswith(b"HTTP/1.1 400")
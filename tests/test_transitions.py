@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import dates_of, restate
+from mpulse_transitions import TransitionEngine
+
+
+def built(df):
+    engine = TransitionEngine()
+    engine.update(df)
+    return engine
+
+
+def assert_same(a, b):
+    cols = list(a.events.columns)
+    ea = a.events.sort_values(cols).reset_index(drop=True)
+    eb = b.events.sort_values(cols).reset_index(drop=True)
+    pd.testing.assert_frame_equal(ea, eb)
+    assert list(a.dates) == list(b.dates)
+
+
+def test_incremental_update_matches_full_build(history):
+    dates = dates_of(history)
+    engine = built(history[history["date_str"] <= dates[-4]])
+    assert engine.update(history) == 3
+    assert_same(engine, built(history))
+
+
+def test_restatement_recomputes_from_changed_date(history):
+    dates = dates_of(history)
+    engine = built(history)
+    restated = restate(history, dates[10], "action", "EXIT")
+    assert engine.update(restated) == len(dates) - 10
+    assert_same(engine, built(restated))
+
+
+def test_unchanged_frame_is_a_no_op(history):
+    engine = built(history)
+    assert engine.update(history) == 0
+
+
+def test_first_observation_is_a_new_event(history):
+    dates = dates_of(history)
+    late = history[~((history["symbol"] == "SYM0000") & (history["date_str"] < dates[5]))]
+    late = restate(late, dates[5], "action", "ENTER")
+    for engine in (built(late), built(late[late["date_str"] <= dates[3]])):
+        engine.update(late)
+        new = engine.feed(kinds=["NEW"], fields=["action"])
+        row = new[new["symbol"] == "SYM0000"]
+        assert len(row) == 1
+        assert row.iloc[0]["date_str"] == dates[5]
+        assert row.iloc[0]["to"] == "ENTER" and row.iloc[0]["from"] is None
+        # Symbols present from the first date aren't "new"
+        assert set(new["symbol"]) == {"SYM0000"}
+
+
+def test_feed_search_tolerates_missing_sectors(history):
+    engine = built(history.assign(sector=np.nan))
+    assert engine.feed(search="sym").empty
+    assert not engine.feed(search="SYM0001").empty
+    assert built(history.drop(columns="sector")).feed(search="Tech").empty
+
+
+def test_transition_counts_rejects_uncoded_field(history):
+    engine = built(history)
+    counts = engine.transition_counts("action")
+    assert counts.to_numpy().sum() > 0
+    with pytest.raises(ValueError):
+        engine.transition_counts("rank")
@@ -0,0 +1,11 @@
+import numpy as np
+
+from mpulse_views import sector_rollups
+
+
+def test_sector_rollups_group_missing_sectors_as_unknown(history):
+    day = history[history["date_str"] == history["date_str"].max()].copy()
+    day.loc[day.index[:3], "sector"] = np.nan
+    stats = sector_rollups(day)
+    assert stats["total"].sum() == len(day)
+    assert stats.loc[stats["sector"] == "Unknown", "total"].item() == 3